@@ -1,18 +1,22 @@
 import os
+import click
 from jobs.raffles_processor import process_raffles
+from jobs.settlement_watcher import watch_raffles
+from jobs.notifications_dispatcher import run_dispatcher
+from jobs.ticket_counts import reconcile_ticket_counts, watch_ticket_counter_shards
+from jobs.raffle_cards import refresh_raffle_cards
+from jobs.message_archive import archive_messages
+from jobs.session_sweeper import sweep_sessions
 from config import Config
 from pathlib import Path
 from datetime import date
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, flash, redirect, session, url_for
-from flask_session import Session
+from flask import Flask, render_template, request, flash, redirect, url_for
 from sqlalchemy import text
 from flask_migrate import Migrate
 from werkzeug.exceptions import RequestEntityTooLarge
 from forms.user_form import DeleteSelfAccountForm
-from models.message_model import Message
 import models  # registers all models with SQLAlchemy metadata
-from models.user_model import User
 from db import db
 from users import users_bp
 from auth import auth_bp
@@ -21,6 +25,8 @@ from checkout import checkout_bp
 from prize_delivery import prize_delivery_bp
 from tickets import tickets_bp
 from utils.helpers import login_required
+from utils.identity import get_current_user
+from utils.sql_session import SqlSessionInterface
 from flask_wtf.csrf import CSRFProtect
 
 # ----------------------------
@@ -62,9 +68,11 @@ os.makedirs(app.config["PRODUCT_IMAGES_FOLDER"], exist_ok=True)
 
 
 # ----------------------------
-# Flask-Session config
+# Sessions (SQL-backed, see utils/sql_session.py)
 # ----------------------------
-Session(app)
+app.session_interface = SqlSessionInterface(
+    Config.SESSION_CACHE_TTL_SECONDS, Config.SESSION_CACHE_SIZE
+)
 
 # ----------------------------
 # Blueprints
@@ -81,8 +89,82 @@ app.register_blueprint(prize_delivery_bp)
 # CLI commands
 # ----------------------------
 @app.cli.command("process-raffles")
-def process_raffles_command():
-    process_raffles()
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of worker processes settling raffles in parallel.",
+)
+@click.option(
+    "--resume",
+    "resume_run_id",
+    default=None,
+    help="Run id of a crashed or partial run to resume instead of starting a new one.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and settle each raffle as soon as it is due.",
+)
+def process_raffles_command(workers, resume_run_id, watch):
+    process_raffles(workers=workers, resume_run_id=resume_run_id)
+    if watch:
+        watch_raffles(workers=workers)
+    print("Done!")
+
+
+@app.cli.command("dispatch-notifications")
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and send new notifications as they are queued.",
+)
+def dispatch_notifications_command(watch):
+    run_dispatcher(watch=watch)
+    print("Done!")
+
+
+@app.cli.command("reconcile-ticket-counts")
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and fold the purchase counter shards as they fill up.",
+)
+def reconcile_ticket_counts_command(watch):
+    reconcile_ticket_counts()
+    if watch:
+        watch_ticket_counter_shards()
+    print("Done!")
+
+
+@app.cli.command("refresh-raffle-cards")
+def refresh_raffle_cards_command():
+    refresh_raffle_cards()
+    print("Done!")
+
+
+@app.cli.command("archive-messages")
+@click.option(
+    "--older-than-days",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Archive read messages older than this (default MESSAGE_ARCHIVE_AFTER_DAYS).",
+)
+@click.option(
+    "--chunk-size",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Message ids scanned per transaction (default MESSAGE_ARCHIVE_CHUNK_SIZE).",
+)
+def archive_messages_command(older_than_days, chunk_size):
+    archive_messages(older_than_days=older_than_days, chunk_size=chunk_size)
+    print("Done!")
+
+
+@app.cli.command("sweep-sessions")
+def sweep_sessions_command():
+    sweep_sessions()
     print("Done!")
 
 
@@ -99,12 +181,7 @@ def after_request(response):
 
 @app.context_processor
 def inject_user():
-    user_id = session.get("user_id")
-    user = None
-    if user_id:
-        user = db.session.get(User, user_id)
-
-    return {"current_user": user}
+    return {"current_user": get_current_user()}
 
 
 @app.context_processor
@@ -121,12 +198,9 @@ def inject_today():
 ## Notifications
 @app.context_processor
 def inject_message_notifications():
-    user_id = session.get("user_id")
-    unread_messages_count = Message.query.filter_by(
-        user_id=user_id, is_read=False
-    ).count()
-
-    return {"unread_messages_count": unread_messages_count}
+    # Denormalized on the request's user (see User.unread_count) - no extra query
+    user = get_current_user()
+    return {"unread_messages_count": user.unread_count if user else 0}
 
 
 # ----------------------------
@@ -38,12 +38,8 @@ def login():
         # Log user in
         # ----------------------------
         user.last_login_at = datetime.now(timezone.utc)
-        session["user"] = (
-            user  # TODO: Update this - since I inject the user directly - I might remove the others and use the object itself
-        )
+        # Only the id - the user itself is loaded per request (utils/identity.py)
         session["user_id"] = user.id
-        session["username"] = user.username
-        session["first_name"] = user.first_name
 
         db.session.commit()
         flash(f"Welcome back, {user.first_name}!", "success")
@@ -13,7 +13,9 @@ from flask import (
 from db import db
 from forms.checkout_form import CheckoutForm
 from models.raffle_model import Raffle
-from models.ticket_model import Ticket
+from exceptions.purchase_exceptions import RaffleNotOpen, TicketLimitReached
+from services.purchase_service import get_user_ticket_count, purchase_tickets
+from services.raffle_listing_service import invalidate_raffle_listings
 from utils.helpers import login_required
 
 checkout_bp = Blueprint("checkout_bp", __name__, url_prefix="/raffles")
@@ -28,9 +30,7 @@ def checkout(raffle_id):
         flash("This raffle is not open for ticket purchases.", "error")
         return redirect(url_for("raffle_bp.get_raffle", id=raffle_id))
 
-    user_ticket_count = Ticket.query.filter_by(
-        raffle_id=raffle_id, user_id=session.get("user_id")
-    ).count()
+    user_ticket_count = get_user_ticket_count(raffle_id, session.get("user_id"))
 
     if user_ticket_count >= raffle.maximum_tickets_per_user:
         flash("You can't buy more tickets for this raffle", "error")
@@ -54,9 +54,8 @@ def create_payment(raffle_id):
     quantity = form.quantity.data
     user_id = session.get("user_id")
 
-    user_ticket_count = Ticket.query.filter_by(
-        raffle_id=raffle_id, user_id=user_id
-    ).count()
+    # Early feedback only - the limit is enforced atomically by purchase_tickets
+    user_ticket_count = get_user_ticket_count(raffle_id, user_id)
 
     if not raffle.is_active:
         flash("This raffle is not open for ticket purchases.", "error")
@@ -117,14 +116,18 @@ def payment_success():
 
     raffle: Raffle = Raffle.query.get_or_404(raffle_id)
 
-    tickets = []
-    for _ in range(quantity):
-        ticket = Ticket(raffle_id=raffle_id, user_id=user_id, price=raffle.ticket_price)
-        tickets.append(ticket)
-
+    # See services/purchase_service.py
     try:
-        db.session.add_all(tickets)
+        purchase_tickets(raffle, user_id, quantity)
         db.session.commit()
+    except RaffleNotOpen:
+        db.session.rollback()
+        flash("This raffle is no longer open for ticket purchases.", "error")
+        return redirect(url_for("raffle_bp.get_raffle", id=raffle_id))
+    except TicketLimitReached:
+        db.session.rollback()
+        flash("You reached the maximum tickets for this raffle", "error")
+        return redirect(url_for("raffle_bp.get_raffle", id=raffle_id))
     except Exception:
         db.session.rollback()
         flash(
@@ -133,5 +136,8 @@ def payment_success():
         )
         return redirect(url_for("raffle_bp.get_raffle", id=raffle_id))
 
+    # The buyer's "My Tickets" totals now include this raffle
+    invalidate_raffle_listings(buyer_id=user_id)
+
     flash(f"Payment successful! {quantity} ticket(s) purchased.", "success")
     return redirect(url_for("raffle_bp.get_raffle", id=raffle_id))
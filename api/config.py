@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,9 +26,16 @@ class Config:
     )
     PRODUCT_IMAGES_FOLDER = str(BASE_DIR / "static" / "uploads" / "images" / "products")
 
-    # Session
+    # Session - stored in the sessions table (utils/sql_session.py), each app process
+    # keeps up to SESSION_CACHE_SIZE of them cached for SESSION_CACHE_TTL_SECONDS
     SESSION_PERMANENT = False
-    SESSION_TYPE = "filesystem"
+    PERMANENT_SESSION_LIFETIME = timedelta(
+        days=int(os.getenv("SESSION_LIFETIME_DAYS", 7))
+    )
+    # The cache TTL also bounds how long a session revoked on one node lives on others
+    SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", 5))
+    SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+    SESSION_SWEEP_CHUNK_SIZE = int(os.getenv("SESSION_SWEEP_CHUNK_SIZE", 1000))
 
     # Business rules
     MIN_PRODUCTS_PER_RAFFLE = 1
@@ -36,8 +44,62 @@ class Config:
     MIN_TICKETS_REQUIRED = 100
     MAX_TICKETS_PER_USER = 1
 
+    # How often reconcile-ticket-counts --watch folds the purchase counter shards of hot
+    # raffles (Raffle.ticket_counter_shards > 0) into raffles.tickets_sold
+    TICKET_COUNTER_FOLD_SECONDS = int(os.getenv("TICKET_COUNTER_FOLD_SECONDS", 10))
+
     # Payment
     SIMULATE_PAYMENT = True
 
     # Courier - Shipping
     SIMULATE_SHIPPING = True
+
+    # Dashboard statistics panel (get_raffles) - cached for this many seconds
+    DASHBOARD_STATS_TTL_SECONDS = int(os.getenv("DASHBOARD_STATS_TTL_SECONDS", 30))
+
+    # Raffle search - most relevant matches considered by the listings
+    SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 1000))
+
+    # Listings - how long the total shown under a cursor-paginated listing is cached
+    PAGINATION_COUNT_TTL_SECONDS = int(os.getenv("PAGINATION_COUNT_TTL_SECONDS", 60))
+    PAGINATION_COUNT_CACHE_SIZE = int(os.getenv("PAGINATION_COUNT_CACHE_SIZE", 4096))
+    # Dashboard listing shared by all viewers (per filter/sort) - cached for this long,
+    # up to LISTING_CACHE_SIZE filter/sort combinations (each holds the full listing)
+    LISTING_CACHE_TTL_SECONDS = int(os.getenv("LISTING_CACHE_TTL_SECONDS", 15))
+    LISTING_CACHE_SIZE = int(os.getenv("LISTING_CACHE_SIZE", 64))
+
+    # Logged in user (utils/identity.py) - rows kept per process, and for how long
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 1024))
+    IDENTITY_CACHE_TTL_SECONDS = int(os.getenv("IDENTITY_CACHE_TTL_SECONDS", 60))
+
+    # Message retention (archive-messages) - read messages older than this are archived
+    MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", 90))
+    MESSAGE_ARCHIVE_CHUNK_SIZE = int(os.getenv("MESSAGE_ARCHIVE_CHUNK_SIZE", 1000))
+
+    # Settlement job (process-raffles --watch)
+    SETTLEMENT_WATCH_POLL_SECONDS = int(os.getenv("SETTLEMENT_WATCH_POLL_SECONDS", 30))
+
+    # Notification outbox (dispatch-notifications)
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", 30))
+    OUTBOX_POLL_SECONDS = int(os.getenv("OUTBOX_POLL_SECONDS", 5))
+    # Sent and failed rows are deleted this long after their last attempt, checked at
+    # most every OUTBOX_PURGE_INTERVAL_SECONDS
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 30))
+    OUTBOX_PURGE_INTERVAL_SECONDS = int(
+        os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", 3600)
+    )
+
+    # Notification providers - without SMTP_HOST emails are only printed
+    SMTP_HOST = os.getenv("SMTP_HOST")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+    SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+    SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+    SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    SMTP_FROM = os.getenv("SMTP_FROM", "no-reply@raffle.local")
+    NOTIFY_SMTP_POOL_SIZE = int(os.getenv("NOTIFY_SMTP_POOL_SIZE", 5))
+    NOTIFY_MAX_CONCURRENCY = int(os.getenv("NOTIFY_MAX_CONCURRENCY", 50))
+    NOTIFY_EMAIL_RATE_PER_SECOND = float(os.getenv("NOTIFY_EMAIL_RATE_PER_SECOND", 50))
+    NOTIFY_SMS_RATE_PER_SECOND = float(os.getenv("NOTIFY_SMS_RATE_PER_SECOND", 20))
+    NOTIFY_SMS_BATCH_SIZE = int(os.getenv("NOTIFY_SMS_BATCH_SIZE", 100))
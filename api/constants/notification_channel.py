@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class NotificationChannel(Enum):
+    EMAIL = "email"
+    SMS = "sms"
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class SettlementOutcome(Enum):
+    PENDING = "pending"
+    WON = "won"
+    CANCELLED = "cancelled"
+    SKIPPED = "skipped"
+    FAILED = "failed"
@@ -0,0 +1,10 @@
+class PurchaseError(Exception):
+    pass
+
+
+class RaffleNotOpen(PurchaseError):
+    pass
+
+
+class TicketLimitReached(PurchaseError):
+    pass
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+from config import Config
+from db import db
+from services.message_archive_service import (
+    archive_read_messages_chunk,
+    last_message_id,
+)
+
+
+# Moves read messages older than older_than_days out of the messages table into
+# message_archive, one committed chunk at a time, so the inbox and unread-badge indexes
+# only cover the recent messages (archive-messages)
+def archive_messages(older_than_days: int = None, chunk_size: int = None):
+    if older_than_days is None:
+        older_than_days = Config.MESSAGE_ARCHIVE_AFTER_DAYS
+    if chunk_size is None:
+        chunk_size = Config.MESSAGE_ARCHIVE_CHUNK_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    print(f"Archiving read messages created before {cutoff:%Y-%m-%d %H:%M} UTC...")
+    archived = 0
+    last_id = 0
+    # Messages inserted while the job runs are too recent to archive anyway
+    max_id = last_message_id()
+    while last_id < max_id:
+        try:
+            moved, last_id = archive_read_messages_chunk(cutoff, last_id, chunk_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if not moved:
+            continue
+        archived += moved
+        print(f"Archived {archived} message(s) so far (up to id {last_id})")
+
+    print(f"Archived {archived} message(s)")
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        archive_messages()
@@ -0,0 +1,129 @@
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import delete
+from db import db
+from constants.outbox_status import OutboxStatus
+from models.notification_outbox_model import NotificationOutbox
+from services.notifications_service import send_notifications
+
+
+# Drains the notification outbox (dispatch-notifications). With watch=True it keeps
+# polling for new rows, otherwise it stops once nothing is due. Finished rows past
+# OUTBOX_RETENTION_DAYS are purged on the way. In watch mode a failing pass is logged
+# and retried a poll later instead of ending the loop.
+def run_dispatcher(watch: bool = False):
+    poll_seconds = current_app.config["OUTBOX_POLL_SECONDS"]
+    purge_interval = current_app.config["OUTBOX_PURGE_INTERVAL_SECONDS"]
+    next_purge_at = 0.0
+
+    while True:
+        try:
+            if time.monotonic() >= next_purge_at:
+                purged = purge_finished_notifications()
+                if purged:
+                    print(f"Purged {purged} finished notification(s)")
+                next_purge_at = time.monotonic() + purge_interval
+
+            dispatched = dispatch_notifications()
+            if dispatched:
+                continue
+            if not watch:
+                break
+            time.sleep(poll_seconds)
+        except Exception as e:
+            db.session.rollback()
+            if not watch:
+                raise
+            print(f"Notification dispatch failed, retrying in {poll_seconds}s: {e}")
+            time.sleep(poll_seconds)
+
+
+# Claims one batch of due notifications (SKIP LOCKED, so several dispatchers can run side
+# by side), sends them concurrently and records the result. Returns the number of claimed rows.
+def dispatch_notifications() -> int:
+    now = datetime.now(timezone.utc)
+    notifications: list[NotificationOutbox] = (
+        NotificationOutbox.query.filter(
+            NotificationOutbox.status == OutboxStatus.PENDING,
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.id)
+        .limit(current_app.config["OUTBOX_BATCH_SIZE"])
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    results = send_notifications(notifications) if notifications else {}
+
+    for notification in notifications:
+        sent, error = results.get(notification.id, (False, "Notification not sent"))
+        if sent:
+            mark_sent(notification)
+        else:
+            schedule_retry(notification, error)
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("Unable to record dispatched notifications:", e)
+
+    return len(notifications)
+
+
+# Deletes SENT and FAILED rows whose last attempt is older than OUTBOX_RETENTION_DAYS,
+# one bounded DELETE per transaction (ix_notification_outbox_status_next_attempt).
+# Returns the number of rows deleted.
+def purge_finished_notifications() -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=current_app.config["OUTBOX_RETENTION_DAYS"]
+    )
+    chunk_size = current_app.config["OUTBOX_BATCH_SIZE"]
+
+    purged = 0
+    while True:
+        deleted = db.session.execute(
+            delete(NotificationOutbox)
+            .where(
+                NotificationOutbox.status.in_([OutboxStatus.SENT, OutboxStatus.FAILED]),
+                NotificationOutbox.next_attempt_at < cutoff,
+            )
+            .with_dialect_options(mysql_limit=chunk_size)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        purged += deleted
+        if deleted < chunk_size:
+            return purged
+
+
+def mark_sent(notification: NotificationOutbox) -> None:
+    notification.status = OutboxStatus.SENT
+    notification.attempts += 1
+    notification.sent_at = datetime.now(timezone.utc)
+    notification.last_error = None
+
+
+# Exponential backoff: base, 2 x base, 4 x base ... until OUTBOX_MAX_ATTEMPTS is reached
+def schedule_retry(notification: NotificationOutbox, error: str) -> None:
+    notification.attempts += 1
+    notification.last_error = error[:400] if error else None
+
+    if notification.attempts >= current_app.config["OUTBOX_MAX_ATTEMPTS"]:
+        notification.status = OutboxStatus.FAILED
+        print(f"Notification {notification.id} failed permanently: {error}")
+        return
+
+    delay = current_app.config["OUTBOX_RETRY_BASE_SECONDS"] * 2 ** (
+        notification.attempts - 1
+    )
+    notification.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    print(f"Notification {notification.id} will be retried in {delay}s: {error}")
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        run_dispatcher()
@@ -0,0 +1,16 @@
+from services.raffle_card_service import rebuild_raffle_cards
+
+
+# Rewrites the raffle_cards projection from the raffles, products and users tables
+# (refresh-raffle-cards). Cards are kept current on every write; this is for backfills
+# and repairs after manual data changes.
+def refresh_raffle_cards():
+    rebuilt = rebuild_raffle_cards()
+    print(f"Rebuilt {rebuilt} raffle card(s)")
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        refresh_raffle_cards()
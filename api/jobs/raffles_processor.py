@@ -1,20 +1,30 @@
-from datetime import date
-import secrets
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from flask import current_app
-from sqlalchemy import func
+from sqlalchemy import func, insert, select
 from db import db
 from models.user_model import User
 from constants.ticket_status import TicketStatus
 from constants.raffle_status import RaffleStatus
 from constants.message_category import MessageCategory
+from constants.settlement_outcome import SettlementOutcome
 from models.raffle_model import Raffle
 from models.ticket_model import Ticket
+from models.settlement_journal_model import SettlementJournalEntry
 from services.notifications_service import (
     queue_message_for_raffle,
     queue_message_for_ticket,
-    send_external_notifications,
+    queue_messages_for_raffle,
 )
 from constants.delivery_status import PrizeDeliveryStatus
+from services.draw_service import draw_winner_ticket
+from services.raffle_card_service import set_raffle_card_status
+from services.dashboard_stats_service import invalidate_dashboard_stats
+from services.raffle_listing_service import invalidate_raffle_listings
+from utils.loader_profiles import loader_profile
 from services.prize_delivery_service import (
     create_prize_delivery,
     create_prize_delivery_log,
@@ -30,67 +40,268 @@ RAFFLE_WON_MESSAGE_LOSER = (
 RAFFLE_WON_MESSAGE_CREATOR = "Your raffle {raffle_id} - {title} was won by user {first_name} {last_name} with ticket {ticket_id} please wait for the user to provide the shipping details for the prize"
 
 
-# Grabs all the active raffles that have the due date in the past
-def get_raffles_due_for_settlement() -> list[Raffle]:
-    raffles = Raffle.query.filter(
-        Raffle.status == RaffleStatus.ACTIVE, func.date(Raffle.due_date) < date.today()
-    ).all()
+# Grabs all the active raffles that are past their due date, each one paired with
+# its number of sold tickets (counted by the db in one grouped query)
+def get_raffles_due_for_settlement() -> list[tuple[Raffle, int]]:
+    raffles = (
+        db.session.query(Raffle, func.count(Ticket.id))
+        .options(*loader_profile("settlement"))
+        .outerjoin(Ticket, Ticket.raffle_id == Raffle.id)
+        .filter(
+            Raffle.status == RaffleStatus.ACTIVE,
+            Raffle.due_date < datetime.now(timezone.utc),
+        )
+        .group_by(Raffle.id)
+        .all()
+    )
 
-    return raffles
+    return [(raffle, tickets_sold) for raffle, tickets_sold in raffles]
 
 
 # Splits raffles in 2 lists, succesfull ones - those that have reached the minimum number of tickets sold and those that didn't
+# (each raffle keeps its tickets sold count - the winner draw works from it)
 def split_raffles_by_minimum_tickets(
-    raffles: list[Raffle],
-) -> tuple[list[Raffle], list[Raffle]]:
-    successful_raffles: list[Raffle] = []
-    failed_raffles: list[Raffle] = []
-
-    for raffle in raffles:
-        if has_raffle_reached_minimum_tickets_sold(raffle):
-            successful_raffles.append(raffle)
+    raffles: list[tuple[Raffle, int]],
+) -> tuple[list[tuple[Raffle, int]], list[tuple[Raffle, int]]]:
+    successful_raffles: list[tuple[Raffle, int]] = []
+    failed_raffles: list[tuple[Raffle, int]] = []
+
+    for raffle, tickets_sold in raffles:
+        if has_raffle_reached_minimum_tickets_sold(raffle, tickets_sold):
+            successful_raffles.append((raffle, tickets_sold))
         else:
-            failed_raffles.append(raffle)
+            failed_raffles.append((raffle, tickets_sold))
 
     return successful_raffles, failed_raffles
 
 
 # Check's if the raffle has reached the required number of tickets to be sold
-def has_raffle_reached_minimum_tickets_sold(raffle: Raffle) -> bool:
-    if len(raffle.tickets) >= raffle.minimum_required_tickets:
+def has_raffle_reached_minimum_tickets_sold(raffle: Raffle, tickets_sold: int) -> bool:
+    if tickets_sold >= raffle.minimum_required_tickets:
         return True
     return False
 
 
-def process_raffles():
-    raffles = get_raffles_due_for_settlement()
+# Settles every due raffle. Each run is journaled (see SettlementJournalEntry) under a run id;
+# passing resume_run_id picks up the raffles of that run that are still pending or failed
+# instead of rescanning for due raffles.
+def process_raffles(workers: int = 1, resume_run_id: str = None) -> str:
+    if resume_run_id:
+        run_id = resume_run_id
+        raffles = get_raffles_to_resume(run_id)
+    else:
+        run_id = str(uuid.uuid4())
+        raffles = get_raffles_due_for_settlement()
+        start_settlement_run(run_id, raffles)
+
     complete_raffles, failed_raffles = split_raffles_by_minimum_tickets(raffles)
 
-    print("\n\nsuccesfull raffles: ", len(complete_raffles))
+    print("\n\nsettlement run: ", run_id)
+    print("succesfull raffles: ", len(complete_raffles))
     print("failed raffles: ", len(failed_raffles))
 
+    if workers > 1:
+        process_raffles_concurrently(run_id, raffles, workers)
+        return run_id
+
     print("\n\n --- Started Processing failed raffles ---")
     # Process the failed raffles
-    if not process_failed_raffles(failed_raffles):
+    if not process_failed_raffles(run_id, failed_raffles):
         print("Some failed raffles could not be settled - see errors above")
 
     print("\n\n --- Finished Processing failed raffles ---")
 
     print("\n\n --- Started Completed failed raffles ---")
     # Process the succesfull raffles
-    if not process_complete_raffles(complete_raffles):
+    if not process_complete_raffles(run_id, complete_raffles):
         print("Some succesfull raffles could not be settled - see errors above")
 
     print("\n\n --- Finished Processing Completed raffles ---")
+    return run_id
+
+
+# Journals every raffle of a new run as PENDING (one multi-row INSERT) before any settlement
+def start_settlement_run(run_id: str, raffles: list[tuple[Raffle, int]]) -> None:
+    if not raffles:
+        return
+
+    db.session.execute(
+        insert(SettlementJournalEntry),
+        [
+            {
+                "run_id": run_id,
+                "raffle_id": raffle.id,
+                "outcome": SettlementOutcome.PENDING,
+            }
+            for raffle, _ in raffles
+        ],
+    )
+    db.session.commit()
+
+
+# The raffles of a run that did not settle yet, with their tickets sold count
+def get_raffles_to_resume(run_id: str) -> list[tuple[Raffle, int]]:
+    raffles = (
+        db.session.query(Raffle, func.count(Ticket.id))
+        .join(SettlementJournalEntry, SettlementJournalEntry.raffle_id == Raffle.id)
+        .outerjoin(Ticket, Ticket.raffle_id == Raffle.id)
+        .filter(
+            SettlementJournalEntry.run_id == run_id,
+            SettlementJournalEntry.outcome.in_(
+                [SettlementOutcome.PENDING, SettlementOutcome.FAILED]
+            ),
+        )
+        .group_by(Raffle.id)
+        .all()
+    )
 
+    return [(raffle, tickets_sold) for raffle, tickets_sold in raffles]
 
-def process_failed_raffles(raffles: list[Raffle]) -> bool:
-    for raffle in raffles:
-        if not process_failed_raffle(raffle):
-            return False
-    return True
+
+def record_settlement_outcome(
+    run_id: str,
+    raffle_id: int,
+    outcome: SettlementOutcome,
+    error: str = None,
+    duration_ms: int = None,
+) -> None:
+    try:
+        SettlementJournalEntry.query.filter_by(
+            run_id=run_id, raffle_id=raffle_id
+        ).update(
+            {
+                SettlementJournalEntry.outcome: outcome,
+                SettlementJournalEntry.error: error[:400] if error else None,
+                SettlementJournalEntry.duration_ms: duration_ms,
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Unable to journal the settlement of raffle {raffle_id}:", e)
+
+
+# Spreads the due raffles over a pool of worker processes. Every worker claims each raffle
+# row before settling it (see claim_raffle_for_settlement), so overlapping pools - on this
+# node or on other nodes - never settle the same raffle twice.
+def process_raffles_concurrently(
+    run_id: str, raffles: list[tuple[Raffle, int]], workers: int
+):
+    items = [(raffle.id, tickets_sold) for raffle, tickets_sold in raffles]
+    chunks = [items[i::workers] for i in range(workers) if items[i::workers]]
+    if not chunks:
+        return
+
+    # Release this process' connection before forking - the workers open their own.
+    db.session.close()
+
+    print(f"\n\n --- Started Processing raffles with {len(chunks)} worker(s) ---")
+    outcomes = Counter()
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        for chunk_outcomes in executor.map(
+            settle_raffles_chunk, [run_id] * len(chunks), chunks
+        ):
+            outcomes.update(chunk_outcomes)
+
+    for outcome, count in outcomes.items():
+        print(f"{outcome} raffles: {count}")
+    print("\n\n --- Finished Processing raffles ---")
+
+
+# Worker process entry point - settles a chunk of (raffle_id, tickets_sold) items and
+# returns how many raffles ended with each outcome
+def settle_raffles_chunk(run_id: str, chunk: list[tuple[int, int]]) -> Counter:
+    from app import app
+
+    with app.app_context():
+        # Drop the connections inherited from the parent process without closing them
+        db.engine.dispose(close=False)
+
+        outcomes = Counter()
+        for raffle_id, tickets_sold in chunk:
+            raffle = db.session.get(Raffle, raffle_id)
+            if raffle is None:
+                continue
+            outcome = settle_raffle(run_id, raffle, tickets_sold)
+            outcomes[outcome.value] += 1
+
+        db.session.remove()
+        return outcomes
+
+
+# Locks the raffle row until the settlement transaction commits or rolls back. Returns None
+# when another worker already holds the row (SKIP LOCKED) or the raffle is no longer ACTIVE
+def claim_raffle_for_settlement(raffle_id: int) -> Raffle | None:
+    return (
+        Raffle.query.filter(
+            Raffle.id == raffle_id, Raffle.status == RaffleStatus.ACTIVE
+        )
+        .with_for_update(skip_locked=True, of=Raffle)
+        .populate_existing()
+        .first()
+    )
+
+
+# Number of tickets sold for the raffle, counted from the tickets table
+def count_raffle_tickets(raffle_id: int) -> int:
+    return db.session.scalar(
+        select(func.count(Ticket.id)).where(Ticket.raffle_id == raffle_id)
+    )
+
+
+# Settles one raffle in isolation and journals the outcome. Any error is rolled back and
+# recorded for this raffle only - it never stops the rest of the run.
+def settle_raffle(run_id: str, raffle: Raffle, tickets_sold: int) -> SettlementOutcome:
+    raffle_id = raffle.id
+    started_at = time.perf_counter()
+    error = None
+
+    try:
+        # Claim the raffle row so no other worker / node settles it at the same time
+        if claim_raffle_for_settlement(raffle_id) is None:
+            print(f"Raffle {raffle_id} is claimed by another worker or already settled")
+            db.session.rollback()
+            outcome = SettlementOutcome.SKIPPED
+        else:
+            # tickets_sold was counted before the claim - recount now that no purchase
+            # can land, so the draw covers every ticket of the raffle
+            tickets_sold = count_raffle_tickets(raffle_id)
+            if has_raffle_reached_minimum_tickets_sold(raffle, tickets_sold):
+                if process_complete_raffle(raffle, tickets_sold):
+                    outcome = SettlementOutcome.WON
+                else:
+                    outcome = SettlementOutcome.FAILED
+                    error = "Settlement rolled back - see the job output"
+            else:
+                if process_failed_raffle(raffle):
+                    outcome = SettlementOutcome.CANCELLED
+                else:
+                    outcome = SettlementOutcome.FAILED
+                    error = "Settlement rolled back - see the job output"
+    except Exception as e:
+        db.session.rollback()
+        print(f"Unable to settle raffle {raffle_id}:", e)
+        outcome = SettlementOutcome.FAILED
+        error = str(e)
+
+    duration_ms = int((time.perf_counter() - started_at) * 1000)
+    record_settlement_outcome(run_id, raffle_id, outcome, error, duration_ms)
+    if outcome in (SettlementOutcome.WON, SettlementOutcome.CANCELLED):
+        invalidate_dashboard_stats()
+        invalidate_raffle_listings()
+    return outcome
+
+
+def process_failed_raffles(run_id: str, raffles: list[tuple[Raffle, int]]) -> bool:
+    all_settled = True
+    for raffle, tickets_sold in raffles:
+        if settle_raffle(run_id, raffle, tickets_sold) == SettlementOutcome.FAILED:
+            all_settled = False
+    return all_settled
 
 
+# Expects the raffle to be claimed (see settle_raffle)
 def process_failed_raffle(raffle: Raffle) -> bool:
     raffle_not_triggered_message_creator = RAFFLE_NOT_TRIGGERED_MESSAGE_CREATOR.format(
         title=raffle.title
@@ -105,19 +316,18 @@ def process_failed_raffle(raffle: Raffle) -> bool:
         db.session.rollback()
         return False
 
-    # 2. Grab all the tickets for each raffle and set the status to CANCELLED
-    if not set_tickets_status(raffle.tickets, TicketStatus.CANCELLED):
+    # 2. Set the status of all the raffle's tickets to CANCELLED (single UPDATE)
+    if not set_raffle_tickets_status(raffle, TicketStatus.CANCELLED):
         db.session.rollback()
         return False
 
     # 3. Send back the money to the ticket buyers
-    if not refund_tickets(raffle.tickets):
+    if not refund_tickets(raffle):
         db.session.rollback()
         return False
 
-    # 4. Queue the in-app messages (DB state) inside this transaction, and collect the
-    #    (user, message) pairs so the external channels can be sent after the commit.
-    external_notifications = [(raffle_creator, raffle_not_triggered_message_creator)]
+    # 4. Queue the in-app messages (DB state) inside this transaction - their email/SMS
+    #    go to the outbox in the same transaction and are sent by the dispatcher.
     queue_message_for_raffle(
         raffle_creator,
         raffle_not_triggered_message_creator,
@@ -126,18 +336,13 @@ def process_failed_raffle(raffle: Raffle) -> bool:
     )
 
     # 5. Notify each distinct ticket buyer that the raffle did not take place (refund confirmed)
-    buyers = {}
-    for ticket in raffle.tickets:
-        buyers[ticket.user_id] = ticket.user
-
-    for buyer in buyers.values():
-        queue_message_for_raffle(
-            buyer,
-            raffle_not_triggered_message_buyer,
-            raffle,
-            category=MessageCategory.LOSS,
-        )
-        external_notifications.append((buyer, raffle_not_triggered_message_buyer))
+    buyers = get_raffle_participants(raffle)
+    queue_messages_for_raffle(
+        buyers,
+        raffle_not_triggered_message_buyer,
+        raffle,
+        category=MessageCategory.LOSS,
+    )
 
     # All steps succeeded - commit the raffle/ticket status changes and messages together.
     try:
@@ -147,34 +352,37 @@ def process_failed_raffle(raffle: Raffle) -> bool:
         print("Unable to settle raffle:", e)
         return False
 
-    # External side effects: only after the settlement is durably committed.
-    for user, message in external_notifications:
-        send_external_notifications(user, message)
-
     return True
 
 
-def process_complete_raffles(raffles: list[Raffle]) -> bool:
-    for raffle in raffles:
-        if not process_complete_raffle(raffle):
-            return False
-    return True
+def process_complete_raffles(run_id: str, raffles: list[tuple[Raffle, int]]) -> bool:
+    all_settled = True
+    for raffle, tickets_sold in raffles:
+        if settle_raffle(run_id, raffle, tickets_sold) == SettlementOutcome.FAILED:
+            all_settled = False
+    return all_settled
 
 
-def process_complete_raffle(raffle: Raffle) -> bool:
+# Expects the raffle to be claimed (see settle_raffle)
+def process_complete_raffle(raffle: Raffle, tickets_sold: int) -> bool:
     raffle_creator: User = raffle.creator
 
     # 1. Set the status in the db to WON
     if not set_raffle_status(raffle, RaffleStatus.WON):
         db.session.rollback()
         return False
-    # 2. Extract a ticket from the raffle tickets
-    winner_ticket: Ticket = extract_winner_ticket(raffle.tickets)
+    # 2. Draw the winner ticket - only that ticket is loaded, and the draw is recorded on the raffle
+    winner_ticket: Ticket = draw_winner_ticket(raffle, tickets_sold)
+    if winner_ticket is None:
+        print(f"Unable to draw a winner ticket for raffle {raffle.id}")
+        db.session.rollback()
+        return False
     winner_user: User = winner_ticket.user
 
-    lost_tickets = [t for t in raffle.tickets if t.id != winner_ticket.id]
-    # 3. Set all the other Raffle's tickets to status = LOST - and set that ticket to status = WINNER
-    if not set_tickets_status(lost_tickets, TicketStatus.LOST):
+    # 3. Set all the other Raffle's tickets to status = LOST (single UPDATE) - and set that ticket to status = WINNER
+    if not set_raffle_tickets_status(
+        raffle, TicketStatus.LOST, exclude_ticket_id=winner_ticket.id
+    ):
         db.session.rollback()
         return False
     winner_ticket.status = TicketStatus.WINNER
@@ -190,9 +398,6 @@ def process_complete_raffle(raffle: Raffle) -> bool:
     db.session.add(prize_delivery)
     db.session.add(prize_delivery_log)
 
-    # Collect (user, message) pairs so external channels can be sent after the commit.
-    external_notifications = []
-
     # 4.1 Notify the winner ticket user that they won and must provide shipping details
     raffle_won_message_winner = RAFFLE_WON_MESSAGE_WINNER.format(
         ticket_id=winner_ticket.id, raffle_id=raffle.id, title=raffle.title
@@ -203,26 +408,15 @@ def process_complete_raffle(raffle: Raffle) -> bool:
         prize_delivery,
         category=MessageCategory.WIN,
     )
-    external_notifications.append((winner_user, raffle_won_message_winner))
 
     # 5. Notify the loser tickets
     raffle_won_message_loser = RAFFLE_WON_MESSAGE_LOSER.format(
         raffle_id=raffle.id, title=raffle.title
     )
-    loser_users = {}
-
-    for ticket in lost_tickets:
-        loser_users[ticket.user_id] = ticket.user
-
-    loser_users = {
-        uid: user for uid, user in loser_users.items() if uid != winner_user.id
-    }
-
-    for loser in loser_users.values():
-        queue_message_for_raffle(
-            loser, raffle_won_message_loser, raffle, category=MessageCategory.LOSS
-        )
-        external_notifications.append((loser, raffle_won_message_loser))
+    loser_users = get_raffle_participants(raffle, exclude_user_id=winner_user.id)
+    queue_messages_for_raffle(
+        loser_users, raffle_won_message_loser, raffle, category=MessageCategory.LOSS
+    )
 
     # 6. Notify the Raffle creator that the raffle was won
     raffle_won_message_creator = RAFFLE_WON_MESSAGE_CREATOR.format(
@@ -235,7 +429,6 @@ def process_complete_raffle(raffle: Raffle) -> bool:
     queue_message_for_raffle(
         raffle_creator, raffle_won_message_creator, raffle, category=MessageCategory.WIN
     )
-    external_notifications.append((raffle_creator, raffle_won_message_creator))
 
     # All steps succeeded - commit the raffle/ticket status changes and messages together.
     try:
@@ -245,31 +438,53 @@ def process_complete_raffle(raffle: Raffle) -> bool:
         print("Unable to settle raffle:", e)
         return False
 
-    # External side effects: only after the settlement is durably committed.
-    for user, message in external_notifications:
-        send_external_notifications(user, message)
-
     return True
 
 
 def set_raffle_status(raffle: Raffle, status: RaffleStatus) -> bool:
     raffle.status = status
+    set_raffle_card_status(raffle.id, status)
     print(f"Raffle status = {status.name}")
     return True
 
 
-def set_tickets_status(tickets: list[Ticket], status: TicketStatus) -> bool:
-    for ticket in tickets:
-        ticket.status = status
+# Sets the status of all the raffle's tickets with one UPDATE, without loading them in the session
+def set_raffle_tickets_status(
+    raffle: Raffle, status: TicketStatus, exclude_ticket_id: int = None
+) -> bool:
+    query = Ticket.query.filter(Ticket.raffle_id == raffle.id)
+    if exclude_ticket_id is not None:
+        query = query.filter(Ticket.id != exclude_ticket_id)
+
+    updated = query.update({Ticket.status: status}, synchronize_session=False)
 
-    print(f"{len(tickets)} ticket(s) status = {status.name}")
+    print(f"{updated} ticket(s) status = {status.name}")
     return True
 
 
-def refund_tickets(tickets: list[Ticket]) -> bool:
+# Distinct ticket buyers of a raffle - only the columns needed to message them, no ORM objects
+def get_raffle_participants(raffle: Raffle, exclude_user_id: int = None) -> list:
+    query = (
+        db.session.query(User.id, User.email, User.phone)
+        .join(Ticket, Ticket.user_id == User.id)
+        .filter(Ticket.raffle_id == raffle.id)
+        .distinct()
+    )
+    if exclude_user_id is not None:
+        query = query.filter(User.id != exclude_user_id)
+
+    return query.all()
+
+
+def refund_tickets(raffle: Raffle) -> bool:
     if current_app.config["SIMULATE_PAYMENT"]:
         return True
 
+    tickets = (
+        db.session.query(Ticket.id, Ticket.price)
+        .filter(Ticket.raffle_id == raffle.id)
+        .yield_per(1000)
+    )
     for ticket in tickets:
         print(f"Refund ticket {ticket.id} for price {ticket.price}.")
     # TODO: Implement this when the payment mechanism will be implemented
@@ -277,11 +492,6 @@ def refund_tickets(tickets: list[Ticket]) -> bool:
     return False
 
 
-def extract_winner_ticket(tickets: list[Ticket]) -> Ticket:
-    winner_ticket = secrets.choice(tickets)
-    return winner_ticket
-
-
 if __name__ == "__main__":
     from app import app
 
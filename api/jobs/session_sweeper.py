@@ -0,0 +1,24 @@
+from config import Config
+from utils.sql_session import delete_expired_sessions
+
+
+# Deletes expired rows of the sessions table, one bounded DELETE at a time so the table
+# is never locked for long (sweep-sessions)
+def sweep_sessions(chunk_size: int = None):
+    chunk_size = chunk_size or Config.SESSION_SWEEP_CHUNK_SIZE
+
+    swept = 0
+    while True:
+        deleted = delete_expired_sessions(chunk_size)
+        swept += deleted
+        if deleted < chunk_size:
+            break
+
+    print(f"Deleted {swept} expired session(s)")
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        sweep_sessions()
@@ -0,0 +1,115 @@
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import func, select
+from db import db
+from constants.raffle_status import RaffleStatus
+from constants.settlement_outcome import SettlementOutcome
+from models.raffle_model import Raffle
+from models.settlement_journal_model import SettlementJournalEntry
+from jobs.raffles_processor import process_raffles
+
+
+# Long running settlement loop (process-raffles --watch). Keeps a min-heap of the due
+# dates of the active raffles, sleeps until the next one and settles the raffles as soon
+# as they are due, popping their due dates. The heap is rebuilt whenever the set of
+# active raffles changes (a raffle is started, edited, settled or deleted), which is
+# detected with one cheap aggregate query every SETTLEMENT_WATCH_POLL_SECONDS; due dates
+# a run already covered are left out. Raffles a run left unsettled are retried a poll
+# later by resuming that same run, until none is left. A failing iteration is logged and
+# retried a poll later, from a heap rebuilt with every due raffle.
+def watch_raffles(workers: int = 1):
+    poll_seconds = current_app.config["SETTLEMENT_WATCH_POLL_SECONDS"]
+    due_dates: list[datetime] = []
+    version = None
+    # Due dates up to this were covered by a run
+    settled_until = None
+    retry_run_id = None
+    retry_at = None
+
+    print(f"Watching active raffles (polling every {poll_seconds}s)")
+    while True:
+        try:
+            current_version = get_active_raffles_version()
+            if current_version != version:
+                due_dates = get_active_raffles_due_dates(after=settled_until)
+                version = current_version
+
+            now = datetime.now(timezone.utc)
+            if due_dates and due_dates[0] <= now:
+                while due_dates and due_dates[0] <= now:
+                    heapq.heappop(due_dates)
+                settled_until = now
+                run_id = process_raffles(workers=workers)
+            elif retry_run_id and retry_at <= now:
+                run_id = process_raffles(workers=workers, resume_run_id=retry_run_id)
+            else:
+                run_id = None
+
+            if run_id:
+                retry_run_id = run_id if has_unsettled_raffles(run_id) else None
+                retry_at = now + timedelta(seconds=poll_seconds)
+                continue
+
+            wake_at = now + timedelta(seconds=poll_seconds)
+            if due_dates:
+                wake_at = min(wake_at, due_dates[0])
+            if retry_run_id:
+                wake_at = min(wake_at, retry_at)
+
+            # End the read transaction so the next poll sees the latest committed rows
+            db.session.rollback()
+            time.sleep(max((wake_at - now).total_seconds(), 0))
+        except Exception as e:
+            db.session.rollback()
+            print(f"Settlement watch failed, retrying in {poll_seconds}s: {e}")
+            version = None
+            settled_until = None
+            time.sleep(poll_seconds)
+
+
+# Whether raffles of the run are still pending or failed (see get_raffles_to_resume)
+def has_unsettled_raffles(run_id: str) -> bool:
+    entry_id = db.session.scalar(
+        select(SettlementJournalEntry.id)
+        .where(
+            SettlementJournalEntry.run_id == run_id,
+            SettlementJournalEntry.outcome.in_(
+                [SettlementOutcome.PENDING, SettlementOutcome.FAILED]
+            ),
+        )
+        .limit(1)
+    )
+    return entry_id is not None
+
+
+# Changes whenever an active raffle is added, edited or removed from the active set
+def get_active_raffles_version() -> tuple:
+    return tuple(
+        db.session.query(func.count(Raffle.id), func.max(Raffle.updated_at))
+        .filter(Raffle.status == RaffleStatus.ACTIVE)
+        .one()
+    )
+
+
+# Min-heap of the distinct due dates of the active raffles, only those after `after`
+# when given
+def get_active_raffles_due_dates(after: datetime = None) -> list[datetime]:
+    query = db.session.query(Raffle.due_date).filter(
+        Raffle.status == RaffleStatus.ACTIVE
+    )
+    if after is not None:
+        query = query.filter(Raffle.due_date > after)
+    rows = query.distinct().all()
+
+    due_dates = [as_utc(due_date) for (due_date,) in rows]
+    heapq.heapify(due_dates)
+    return due_dates
+
+
+# MySQL returns naive datetimes - the due dates are stored in UTC
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
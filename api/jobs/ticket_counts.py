@@ -0,0 +1,50 @@
+import time
+from config import Config
+from db import db
+from services.ticket_counter_service import (
+    fold_ticket_counter_shards,
+    reconcile_tickets_sold,
+    reconcile_user_ticket_counts,
+)
+
+
+# Keeps Raffle.tickets_sold accurate: folds the counter shards of hot raffles and
+# repairs any drift against the tickets table, then rebuilds the per-user purchase
+# counters (reconcile-ticket-counts)
+def reconcile_ticket_counts():
+    folded = fold_ticket_counter_shards()
+    print(f"Folded the counter shards of {folded} raffle(s)")
+
+    corrected = reconcile_tickets_sold()
+    print(f"Corrected tickets_sold on {corrected} raffle(s)")
+
+    reconcile_user_ticket_counts()
+    print("Rebuilt the per-user ticket counters")
+
+
+# Long running fold loop (reconcile-ticket-counts --watch): purchases of hot raffles
+# increment a counter shard, so their tickets_sold and cards only move when the shards
+# are folded
+def watch_ticket_counter_shards():
+    fold_seconds = Config.TICKET_COUNTER_FOLD_SECONDS
+
+    print(f"Folding ticket counter shards every {fold_seconds}s")
+    while True:
+        try:
+            folded = fold_ticket_counter_shards()
+            if folded:
+                print(f"Folded the counter shards of {folded} raffle(s)")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Folding the ticket counter shards failed: {e}")
+
+        # End the read transaction so the next fold sees the latest committed shards
+        db.session.rollback()
+        time.sleep(fold_seconds)
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        reconcile_ticket_counts()
@@ -0,0 +1,43 @@
+"""add sessions table
+
+Server-side sessions (utils/sql_session.py), replacing Flask-Session's filesystem
+store. Existing filesystem sessions are not migrated - users log in again.
+
+Revision ID: 0c4e6a8b2d93
+Revises: 6a8c0e2f4b71
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0c4e6a8b2d93"
+down_revision = "6a8c0e2f4b71"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("sessions", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_sessions_user_id"), ["user_id"], unique=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_sessions_expires_at"), ["expires_at"], unique=False
+        )
+
+
+def downgrade():
+    op.drop_table("sessions")
@@ -0,0 +1,39 @@
+"""add last_read_message_id to users
+
+Inbox watermark: messages above it are shown as new. Backfilled with each user's
+newest read message.
+
+Revision ID: 1b5d9f3e7a62
+Revises: 8e3c1a7f5b29
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "1b5d9f3e7a62"
+down_revision = "8e3c1a7f5b29"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("last_read_message_id", sa.Integer(), nullable=True)
+        )
+
+    op.execute(
+        "UPDATE users u "
+        "JOIN (SELECT user_id, MAX(id) AS last_read FROM messages "
+        "WHERE is_read = 1 GROUP BY user_id) m "
+        "ON m.user_id = u.id "
+        "SET u.last_read_message_id = m.last_read"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_column("last_read_message_id")
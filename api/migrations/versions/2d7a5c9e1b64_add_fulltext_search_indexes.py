@@ -0,0 +1,45 @@
+"""add fulltext search indexes
+
+FULLTEXT indexes on raffles(title, description) and products(name, description)
+behind services/search_service.py, replacing the '%term%' scans of the listings.
+
+Revision ID: 2d7a5c9e1b64
+Revises: 6c1e9f3a5d48
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "2d7a5c9e1b64"
+down_revision = "6c1e9f3a5d48"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.create_index(
+            "ft_raffles_title_description",
+            ["title", "description"],
+            unique=False,
+            mysql_prefix="FULLTEXT",
+        )
+
+    with op.batch_alter_table("products", schema=None) as batch_op:
+        batch_op.create_index(
+            "ft_products_name_description",
+            ["name", "description"],
+            unique=False,
+            mysql_prefix="FULLTEXT",
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("products", schema=None) as batch_op:
+        batch_op.drop_index("ft_products_name_description")
+
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.drop_index("ft_raffles_title_description")
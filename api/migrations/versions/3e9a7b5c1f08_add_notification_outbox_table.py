@@ -0,0 +1,60 @@
+"""add notification outbox table
+
+External notifications (email / SMS) are staged in notification_outbox in the same
+transaction as the in-app message that triggered them, and sent afterwards by the
+dispatch-notifications job with retries and exponential backoff.
+
+Revision ID: 3e9a7b5c1f08
+Revises: 8c2f4e6a1d93
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3e9a7b5c1f08"
+down_revision = "8c2f4e6a1d93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "channel",
+            sa.Enum("email", "sms", name="notification_channel"),
+            nullable=False,
+        ),
+        sa.Column("recipient", sa.String(length=100), nullable=False),
+        sa.Column("body", sa.String(length=400), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "sent", "failed", name="outbox_status"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String(length=400), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("notification_outbox", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_notification_outbox_status_next_attempt",
+            ["status", "next_attempt_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("notification_outbox", schema=None) as batch_op:
+        batch_op.drop_index("ix_notification_outbox_status_next_attempt")
+
+    op.drop_table("notification_outbox")
@@ -0,0 +1,123 @@
+"""add raffle_cards projection
+
+Creates the raffle_cards read model behind the dashboard (one row per raffle with its
+cover image, creator name, total estimated value and sold tickets) and backfills it
+from the raffles, products, product_images and users tables.
+
+Revision ID: 4f6b8d0a2c35
+Revises: 9a4d2c8e6b17
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4f6b8d0a2c35"
+down_revision = "9a4d2c8e6b17"
+branch_labels = None
+depends_on = None
+
+
+RAFFLE_STATUS_VALUES = (
+    "draft",
+    "active",
+    "won",
+    "completed",
+    "cancelled",
+    "contested",
+    "rejected_prize",
+)
+
+
+def upgrade():
+    op.create_table(
+        "raffle_cards",
+        sa.Column("raffle_id", sa.Integer(), nullable=False),
+        sa.Column("creator_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(*RAFFLE_STATUS_VALUES, name="raffle_status"),
+            nullable=False,
+        ),
+        sa.Column("title", sa.String(length=50), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=False),
+        sa.Column("ticket_price", sa.Integer(), nullable=False),
+        sa.Column("minimum_required_tickets", sa.Integer(), nullable=False),
+        sa.Column("maximum_tickets_per_user", sa.Integer(), nullable=False),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("cover_image_url", sa.String(length=255), nullable=True),
+        sa.Column("cover_product_name", sa.String(length=100), nullable=True),
+        sa.Column("creator_name", sa.String(length=101), nullable=False),
+        sa.Column("total_estimated_value", sa.Integer(), nullable=False),
+        sa.Column("tickets_sold", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("raffle_id"),
+    )
+    with op.batch_alter_table("raffle_cards", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_raffle_cards_creator_id"), ["creator_id"], unique=False
+        )
+        batch_op.create_index(
+            "ix_raffle_cards_status_due_date", ["status", "due_date"], unique=False
+        )
+        batch_op.create_index(
+            "ix_raffle_cards_status_created_at", ["status", "created_at"], unique=False
+        )
+        batch_op.create_index(
+            "ix_raffle_cards_status_ticket_price",
+            ["status", "ticket_price"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_raffle_cards_status_tickets_sold",
+            ["status", "tickets_sold"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_raffle_cards_status_total_estimated_value",
+            ["status", "total_estimated_value"],
+            unique=False,
+        )
+
+    # The cover is the first product (by id) and its first image (by id)
+    op.execute(
+        """
+        INSERT INTO raffle_cards (
+            raffle_id, creator_id, status, title, description, ticket_price,
+            minimum_required_tickets, maximum_tickets_per_user, due_date, created_at,
+            cover_image_url, cover_product_name, creator_name, total_estimated_value,
+            tickets_sold
+        )
+        SELECT
+            r.id, r.creator_id, r.status, r.title, r.description, r.ticket_price,
+            r.minimum_required_tickets, r.maximum_tickets_per_user, r.due_date,
+            r.created_at,
+            (
+                SELECT pi.image_url FROM product_images pi
+                WHERE pi.product_id = (
+                    SELECT MIN(p.id) FROM products p WHERE p.raffle_id = r.id
+                )
+                ORDER BY pi.id LIMIT 1
+            ),
+            (
+                SELECT p.name FROM products p
+                WHERE p.raffle_id = r.id ORDER BY p.id LIMIT 1
+            ),
+            CONCAT(u.first_name, ' ', u.last_name),
+            (
+                SELECT COALESCE(SUM(p.estimated_value), 0) FROM products p
+                WHERE p.raffle_id = r.id
+            ),
+            r.tickets_sold
+        FROM raffles r
+        JOIN users u ON u.id = r.creator_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("raffle_cards")
@@ -0,0 +1,37 @@
+"""add draw audit columns to raffles
+
+Adds nullable raffles.draw_seed / draw_ticket_ordinal / draw_ticket_count. The
+settlement job records the seed it drew the winner from, the resulting ticket ordinal
+(by ticket id) and the ticket count, so a draw can be re-derived and audited.
+Raffles settled before this change stay NULL.
+
+Revision ID: 5b7e1c9d2a41
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b7e1c9d2a41"
+down_revision = "b2c3d4e5f6a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("draw_seed", sa.String(length=64), nullable=True))
+        batch_op.add_column(
+            sa.Column("draw_ticket_ordinal", sa.Integer(), nullable=True)
+        )
+        batch_op.add_column(sa.Column("draw_ticket_count", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.drop_column("draw_ticket_count")
+        batch_op.drop_column("draw_ticket_ordinal")
+        batch_op.drop_column("draw_seed")
@@ -0,0 +1,41 @@
+"""add raffle_user_ticket_counts table
+
+Per (raffle, user) ticket counter used by the purchase engine to enforce
+maximum_tickets_per_user with one conditional UPDATE, backfilled from the
+tickets table.
+
+Revision ID: 5e7a9c1d3f86
+Revises: 0c4e6a8b2d93
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e7a9c1d3f86"
+down_revision = "0c4e6a8b2d93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "raffle_user_ticket_counts",
+        sa.Column("raffle_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("raffle_id", "user_id"),
+    )
+
+    op.execute(
+        "INSERT INTO raffle_user_ticket_counts (raffle_id, user_id, count) "
+        "SELECT raffle_id, user_id, COUNT(*) FROM tickets GROUP BY raffle_id, user_id"
+    )
+
+
+def downgrade():
+    op.drop_table("raffle_user_ticket_counts")
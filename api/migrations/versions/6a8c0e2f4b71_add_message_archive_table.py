@@ -0,0 +1,62 @@
+"""add message_archive table
+
+Read messages older than MESSAGE_ARCHIVE_AFTER_DAYS are moved here by the
+archive-messages job, keeping their id, so the messages table only holds the
+recent set.
+
+Revision ID: 6a8c0e2f4b71
+Revises: 1b5d9f3e7a62
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6a8c0e2f4b71"
+down_revision = "1b5d9f3e7a62"
+branch_labels = None
+depends_on = None
+
+MESSAGE_CATEGORY = sa.Enum("win", "loss", "info", name="message_category")
+
+
+def upgrade():
+    op.create_table(
+        "message_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("raffle_id", sa.Integer(), nullable=True),
+        sa.Column("ticket_id", sa.Integer(), nullable=True),
+        sa.Column("prize_delivery_id", sa.Integer(), nullable=True),
+        sa.Column("broadcast_id", sa.Integer(), nullable=True),
+        sa.Column("body", sa.String(length=400), nullable=True),
+        sa.Column("category", MESSAGE_CATEGORY, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["ticket_id"], ["tickets.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(
+            ["prize_delivery_id"], ["prize_deliveries.id"], ondelete="SET NULL"
+        ),
+        sa.ForeignKeyConstraint(
+            ["broadcast_id"], ["broadcast_messages.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("message_archive", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_message_archive_user_id_id", ["user_id", "id"], unique=False
+        )
+
+
+def downgrade():
+    # Archived messages go back to the live table, read
+    op.execute(
+        "INSERT INTO messages (id, user_id, raffle_id, ticket_id, prize_delivery_id, "
+        "broadcast_id, body, category, created_at, is_read) "
+        "SELECT id, user_id, raffle_id, ticket_id, prize_delivery_id, broadcast_id, "
+        "body, category, created_at, 1 FROM message_archive"
+    )
+    op.drop_table("message_archive")
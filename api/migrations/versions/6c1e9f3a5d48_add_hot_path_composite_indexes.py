@@ -0,0 +1,63 @@
+"""add hot path composite indexes
+
+Secondary indexes for the queries run on every request or settlement run:
+raffles(status, due_date), tickets(raffle_id, user_id), tickets(user_id, status)
+(covering raffle_id and price for the my tickets totals) and
+messages(user_id, is_read, created_at). scripts/explain_hot_queries.py checks that
+MySQL picks them.
+
+Revision ID: 6c1e9f3a5d48
+Revises: 4f6b8d0a2c35
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6c1e9f3a5d48"
+down_revision = "4f6b8d0a2c35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_raffles_status_due_date", ["status", "due_date"], unique=False
+        )
+
+    with op.batch_alter_table("tickets", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_tickets_raffle_id_user_id", ["raffle_id", "user_id"], unique=False
+        )
+        batch_op.create_index(
+            "ix_tickets_user_id_status",
+            ["user_id", "status", "raffle_id", "price"],
+            unique=False,
+        )
+
+    with op.batch_alter_table("messages", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_messages_user_id_is_read_created_at",
+            ["user_id", "is_read", "created_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    # MySQL drops the implicit foreign key indexes once a composite index can serve the
+    # constraint, so give the foreign keys plain indexes back before dropping ours
+    with op.batch_alter_table("messages", schema=None) as batch_op:
+        batch_op.create_index("ix_messages_user_id", ["user_id"], unique=False)
+        batch_op.drop_index("ix_messages_user_id_is_read_created_at")
+
+    with op.batch_alter_table("tickets", schema=None) as batch_op:
+        batch_op.create_index("ix_tickets_raffle_id", ["raffle_id"], unique=False)
+        batch_op.create_index("ix_tickets_user_id", ["user_id"], unique=False)
+        batch_op.drop_index("ix_tickets_user_id_status")
+        batch_op.drop_index("ix_tickets_raffle_id_user_id")
+
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.drop_index("ix_raffles_status_due_date")
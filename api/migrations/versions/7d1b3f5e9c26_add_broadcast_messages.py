@@ -0,0 +1,61 @@
+"""add broadcast messages
+
+Raffle-wide announcements (settlement loser / refund messages) store their text once
+in broadcast_messages. Each recipient gets a lightweight messages row with
+broadcast_id set and body NULL, so messages.body becomes nullable. Existing rows keep
+their body and a NULL broadcast_id.
+
+Revision ID: 7d1b3f5e9c26
+Revises: 3e9a7b5c1f08
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7d1b3f5e9c26"
+down_revision = "3e9a7b5c1f08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "broadcast_messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("raffle_id", sa.Integer(), nullable=True),
+        sa.Column("body", sa.String(length=400), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("messages", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("broadcast_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_messages_broadcast_id",
+            "broadcast_messages",
+            ["broadcast_id"],
+            ["id"],
+            ondelete="CASCADE",
+        )
+        batch_op.alter_column(
+            "body", existing_type=sa.String(length=400), nullable=True
+        )
+
+
+def downgrade():
+    # Copy the shared text back onto the receipts before body becomes NOT NULL again
+    op.execute(
+        "UPDATE messages m JOIN broadcast_messages b ON b.id = m.broadcast_id "
+        "SET m.body = b.body WHERE m.body IS NULL"
+    )
+    with op.batch_alter_table("messages", schema=None) as batch_op:
+        batch_op.alter_column(
+            "body", existing_type=sa.String(length=400), nullable=False
+        )
+        batch_op.drop_constraint("fk_messages_broadcast_id", type_="foreignkey")
+        batch_op.drop_column("broadcast_id")
+
+    op.drop_table("broadcast_messages")
@@ -0,0 +1,61 @@
+"""add settlement journal table
+
+One row per (process-raffles run, raffle): written as "pending" when the run starts
+and updated with the outcome, error and duration as each raffle settles, so a crashed
+or partial run can be resumed by run id.
+
+Revision ID: 8c2f4e6a1d93
+Revises: 5b7e1c9d2a41
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c2f4e6a1d93"
+down_revision = "5b7e1c9d2a41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "settlement_journal",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("run_id", sa.String(length=36), nullable=False),
+        sa.Column("raffle_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "outcome",
+            sa.Enum(
+                "pending",
+                "won",
+                "cancelled",
+                "skipped",
+                "failed",
+                name="settlement_outcome",
+            ),
+            nullable=False,
+        ),
+        sa.Column("error", sa.String(length=400), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "run_id", "raffle_id", name="uq_settlement_journal_run_raffle"
+        ),
+    )
+    with op.batch_alter_table("settlement_journal", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_settlement_journal_run_id"), ["run_id"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("settlement_journal", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_settlement_journal_run_id"))
+
+    op.drop_table("settlement_journal")
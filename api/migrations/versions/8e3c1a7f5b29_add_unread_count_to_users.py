@@ -0,0 +1,39 @@
+"""add unread_count to users
+
+Denormalized count of each user's unread messages behind the navbar badge,
+backfilled from the messages table.
+
+Revision ID: 8e3c1a7f5b29
+Revises: 2d7a5c9e1b64
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8e3c1a7f5b29"
+down_revision = "2d7a5c9e1b64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0")
+        )
+
+    op.execute(
+        "UPDATE users u "
+        "JOIN (SELECT user_id, COUNT(*) AS unread FROM messages "
+        "WHERE is_read = 0 GROUP BY user_id) m "
+        "ON m.user_id = u.id "
+        "SET u.unread_count = m.unread"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_column("unread_count")
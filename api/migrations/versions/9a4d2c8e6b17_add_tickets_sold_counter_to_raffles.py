@@ -0,0 +1,63 @@
+"""add tickets_sold counter to raffles
+
+Adds the denormalized raffles.tickets_sold counter (indexed, backfilled from the
+tickets table) and raffles.ticket_counter_shards, plus the
+raffle_ticket_counter_shards table used to spread the increments of hot raffles.
+
+Revision ID: 9a4d2c8e6b17
+Revises: 7d1b3f5e9c26
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9a4d2c8e6b17"
+down_revision = "7d1b3f5e9c26"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("tickets_sold", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(
+            sa.Column(
+                "ticket_counter_shards",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            )
+        )
+        batch_op.create_index(
+            batch_op.f("ix_raffles_tickets_sold"), ["tickets_sold"], unique=False
+        )
+
+    op.execute(
+        "UPDATE raffles r "
+        "JOIN (SELECT raffle_id, COUNT(*) AS sold FROM tickets GROUP BY raffle_id) t "
+        "ON t.raffle_id = r.id "
+        "SET r.tickets_sold = t.sold"
+    )
+
+    op.create_table(
+        "raffle_ticket_counter_shards",
+        sa.Column("raffle_id", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("raffle_id", "shard"),
+    )
+
+
+def downgrade():
+    op.drop_table("raffle_ticket_counter_shards")
+
+    with op.batch_alter_table("raffles", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_raffles_tickets_sold"))
+        batch_op.drop_column("ticket_counter_shards")
+        batch_op.drop_column("tickets_sold")
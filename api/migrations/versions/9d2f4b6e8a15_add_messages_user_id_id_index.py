@@ -0,0 +1,29 @@
+"""add messages (user_id, id) index
+
+The inbox pages a user's messages newest first by id (keyset on messages.id).
+ix_messages_user_id_is_read_created_at can't serve that order, so MySQL sorted
+every message of the user for each page. Same index as message_archive has.
+
+Revision ID: 9d2f4b6e8a15
+Revises: 5e7a9c1d3f86
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "9d2f4b6e8a15"
+down_revision = "5e7a9c1d3f86"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("messages", schema=None) as batch_op:
+        batch_op.create_index("ix_messages_user_id_id", ["user_id", "id"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("messages", schema=None) as batch_op:
+        batch_op.drop_index("ix_messages_user_id_id")
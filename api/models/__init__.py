@@ -6,3 +6,11 @@ from models.ticket_model import Ticket
 from models.message_model import Message
 from models.prize_delivery_model import PrizeDelivery
 from models.prize_delivery_log_model import PrizeDeliveryLog
+from models.settlement_journal_model import SettlementJournalEntry
+from models.notification_outbox_model import NotificationOutbox
+from models.broadcast_message_model import BroadcastMessage
+from models.raffle_ticket_counter_shard_model import RaffleTicketCounterShard
+from models.raffle_card_model import RaffleCard
+from models.archived_message_model import ArchivedMessage
+from models.session_model import StoredSession
+from models.raffle_user_ticket_count_model import RaffleUserTicketCount
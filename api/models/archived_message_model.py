@@ -0,0 +1,59 @@
+from sqlalchemy import Enum as SqlEnum
+from constants.message_category import MessageCategory
+from db import db
+
+
+# Read messages moved out of the messages table by the archive-messages job (see
+# services/message_archive_service.py), keeping their id. Same columns as Message minus
+# is_read - only read messages are archived. The inbox reads them after the live ones.
+class ArchivedMessage(db.Model):
+    __tablename__ = "message_archive"
+    __table_args__ = (
+        # A user's archived messages, newest first: inbox pages past the live set
+        db.Index("ix_message_archive_user_id_id", "user_id", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # Owner: removed by the database along with the user
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    raffle_id = db.Column(
+        db.Integer, db.ForeignKey("raffles.id", ondelete="SET NULL"), nullable=True
+    )
+    ticket_id = db.Column(
+        db.Integer, db.ForeignKey("tickets.id", ondelete="SET NULL"), nullable=True
+    )
+    prize_delivery_id = db.Column(
+        db.Integer,
+        db.ForeignKey("prize_deliveries.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    broadcast_id = db.Column(
+        db.Integer,
+        db.ForeignKey("broadcast_messages.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+
+    body = db.Column(db.String(400), nullable=True)
+    category = db.Column(
+        SqlEnum(
+            MessageCategory,
+            name="message_category",
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=True,
+    )
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    # Relations
+    raffle = db.relationship("Raffle")
+    ticket = db.relationship("Ticket")
+    prize_delivery = db.relationship("PrizeDelivery")
+    broadcast = db.relationship("BroadcastMessage")
+
+    @property
+    def text(self):
+        if self.body is None and self.broadcast is not None:
+            return self.broadcast.body
+        return self.body
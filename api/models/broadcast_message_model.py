@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+from db import db
+
+
+# Text shared by every recipient of a raffle-wide announcement (e.g. the loser / refund
+# messages sent on settlement). It is stored once; each recipient only gets a lightweight
+# Message receipt row pointing at it (see Message.broadcast_id).
+class BroadcastMessage(db.Model):
+    __tablename__ = "broadcast_messages"
+
+    id = db.Column(db.Integer, primary_key=True)
+    raffle_id = db.Column(
+        db.Integer, db.ForeignKey("raffles.id", ondelete="SET NULL"), nullable=True
+    )
+    body = db.Column(db.String(400), nullable=False)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
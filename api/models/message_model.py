@@ -6,6 +6,14 @@ from db import db
 
 class Message(db.Model):
     __tablename__ = "messages"
+    __table_args__ = (
+        # A user's (unread) messages, newest first: unread badge, inbox
+        db.Index(
+            "ix_messages_user_id_is_read_created_at", "user_id", "is_read", "created_at"
+        ),
+        # A user's messages by id, newest first: the inbox keyset pages
+        db.Index("ix_messages_user_id_id", "user_id", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     # Owner of the message: deleted with the user (see User.messages cascade).
@@ -24,7 +32,15 @@ class Message(db.Model):
         nullable=True,
     )
 
-    body = db.Column(db.String(400), nullable=False)
+    # Broadcast receipts (broadcast_id set) leave body NULL and read the shared text from
+    # the BroadcastMessage - use Message.text to get the body of any message.
+    broadcast_id = db.Column(
+        db.Integer,
+        db.ForeignKey("broadcast_messages.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+
+    body = db.Column(db.String(400), nullable=True)
     # Sentiment of the message, set by the sender at creation (see MessageCategory).
     # Drives the row tint in the UI so it never has to be inferred from the message's
     # other fields. NULL renders neutral.
@@ -48,3 +64,10 @@ class Message(db.Model):
     raffle = db.relationship("Raffle")
     ticket = db.relationship("Ticket")
     prize_delivery = db.relationship("PrizeDelivery")
+    broadcast = db.relationship("BroadcastMessage")
+
+    @property
+    def text(self):
+        if self.body is None and self.broadcast is not None:
+            return self.broadcast.body
+        return self.body
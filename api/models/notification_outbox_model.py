@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from sqlalchemy import Enum as SqlEnum
+from constants.notification_channel import NotificationChannel
+from constants.outbox_status import OutboxStatus
+from db import db
+
+
+# External notification (email / SMS) staged in the same transaction as the change that
+# triggered it, and sent afterwards by the dispatcher (jobs/notifications_dispatcher.py).
+class NotificationOutbox(db.Model):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        db.Index(
+            "ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+
+    channel = db.Column(
+        SqlEnum(
+            NotificationChannel,
+            name="notification_channel",
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=False,
+    )
+    # Email address or phone number, captured when the notification was queued
+    recipient = db.Column(db.String(100), nullable=False)
+    body = db.Column(db.String(400), nullable=False)
+
+    status = db.Column(
+        SqlEnum(
+            OutboxStatus,
+            name="outbox_status",
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=False,
+        default=OutboxStatus.PENDING,
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    last_error = db.Column(db.String(400), nullable=True)
+
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    sent_at = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -5,6 +5,15 @@ from sqlalchemy import Enum as SqlEnum
 
 class Product(db.Model):
     __tablename__ = "products"
+    __table_args__ = (
+        # Search (see services/search_service.py)
+        db.Index(
+            "ft_products_name_description",
+            "name",
+            "description",
+            mysql_prefix="FULLTEXT",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     raffle_id = db.Column(db.Integer, db.ForeignKey("raffles.id"), nullable=False)
@@ -0,0 +1,57 @@
+from sqlalchemy import Enum as SqlEnum
+from constants.raffle_status import RaffleStatus
+from db import db
+
+
+# Read model behind the dashboard cards: one row per raffle with everything a card
+# renders, so a listing page is a single indexed query. Kept current by
+# services/raffle_card_service.py on raffle create, update, start, purchase and settlement.
+class RaffleCard(db.Model):
+    __tablename__ = "raffle_cards"
+    __table_args__ = (
+        db.Index("ix_raffle_cards_status_due_date", "status", "due_date"),
+        db.Index("ix_raffle_cards_status_created_at", "status", "created_at"),
+        db.Index("ix_raffle_cards_status_ticket_price", "status", "ticket_price"),
+        db.Index("ix_raffle_cards_status_tickets_sold", "status", "tickets_sold"),
+        db.Index(
+            "ix_raffle_cards_status_total_estimated_value",
+            "status",
+            "total_estimated_value",
+        ),
+    )
+
+    raffle_id = db.Column(
+        db.Integer,
+        db.ForeignKey("raffles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    creator_id = db.Column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
+    )
+
+    status = db.Column(
+        SqlEnum(
+            RaffleStatus,
+            name="raffle_status",
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=False,
+    )
+    title = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+    ticket_price = db.Column(db.Integer, nullable=False)
+    minimum_required_tickets = db.Column(db.Integer, nullable=False)
+    maximum_tickets_per_user = db.Column(db.Integer, nullable=False)
+    due_date = db.Column(db.DateTime(timezone=True), nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    cover_image_url = db.Column(db.String(255), nullable=True)
+    cover_product_name = db.Column(db.String(100), nullable=True)
+    creator_name = db.Column(db.String(101), nullable=False)
+    total_estimated_value = db.Column(db.Integer, nullable=False, default=0)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+
+    # Cards are rendered with the raffle's id, like the raffle itself
+    @property
+    def id(self):
+        return self.raffle_id
@@ -7,6 +7,17 @@ from db import db
 
 class Raffle(db.Model):
     __tablename__ = "raffles"
+    __table_args__ = (
+        # Active raffles by due date: settlement job, watcher
+        db.Index("ix_raffles_status_due_date", "status", "due_date"),
+        # Search (see services/search_service.py)
+        db.Index(
+            "ft_raffles_title_description",
+            "title",
+            "description",
+            mysql_prefix="FULLTEXT",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     creator_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -31,6 +42,20 @@ class Raffle(db.Model):
         db.Integer, nullable=False, default=Config.MAX_TICKETS_PER_USER
     )
     due_date = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    # Denormalized number of sold tickets, kept in step by the purchase and reconciled
+    # by the reconcile-ticket-counts job (see services/ticket_counter_service.py). When
+    # ticket_counter_shards > 0 (hot raffles) purchases increment a random one of that
+    # many counter shards instead, and the job folds them back into tickets_sold.
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0, index=True)
+    ticket_counter_shards = db.Column(db.Integer, nullable=False, default=0)
+
+    # Winner draw audit trail (see services/draw_service.py): the winning ticket is the
+    # draw_ticket_ordinal-th ticket (by id) out of draw_ticket_count, derived from draw_seed.
+    draw_seed = db.Column(db.String(64), nullable=True)
+    draw_ticket_ordinal = db.Column(db.Integer, nullable=True)
+    draw_ticket_count = db.Column(db.Integer, nullable=True)
+
     created_at = db.Column(
         db.DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -0,0 +1,16 @@
+from db import db
+
+
+# Write buffer for the tickets_sold counter of hot raffles: concurrent purchases spread
+# their increments over several rows instead of contending on the raffle row. The
+# reconcile-ticket-counts job folds the shards back into Raffle.tickets_sold.
+class RaffleTicketCounterShard(db.Model):
+    __tablename__ = "raffle_ticket_counter_shards"
+
+    raffle_id = db.Column(
+        db.Integer,
+        db.ForeignKey("raffles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    shard = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
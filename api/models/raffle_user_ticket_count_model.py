@@ -0,0 +1,20 @@
+from db import db
+
+
+# Tickets each user holds in a raffle, maintained by the purchase engine
+# (services/purchase_service.py). Its conditional UPDATE enforces
+# Raffle.maximum_tickets_per_user atomically, locking only the buyer's own row.
+class RaffleUserTicketCount(db.Model):
+    __tablename__ = "raffle_user_ticket_counts"
+
+    raffle_id = db.Column(
+        db.Integer,
+        db.ForeignKey("raffles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    count = db.Column(db.Integer, nullable=False, default=0)
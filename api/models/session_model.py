@@ -0,0 +1,22 @@
+from db import db
+
+
+# Server-side Flask session (see utils/sql_session.py). data is the serialized session
+# dict - only ids and small values, never ORM objects. version goes up on every write
+# and is echoed in the cookie, so every app node can tell whether its cached copy of
+# the session is current without reading the row.
+class StoredSession(db.Model):
+    __tablename__ = "sessions"
+
+    id = db.Column(db.String(64), primary_key=True)
+    # Logged in user, if any: the user's sessions go away with the account
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    data = db.Column(db.Text, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    # Swept by sweep-sessions (jobs/session_sweeper.py)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
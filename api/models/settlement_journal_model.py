@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from sqlalchemy import Enum as SqlEnum
+from constants.settlement_outcome import SettlementOutcome
+from db import db
+
+
+# One raffle of a process-raffles run. Rows are written as PENDING when the run starts and
+# updated as each raffle settles, so a crashed or partial run can be resumed by its run_id.
+class SettlementJournalEntry(db.Model):
+    __tablename__ = "settlement_journal"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "run_id", "raffle_id", name="uq_settlement_journal_run_raffle"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(36), nullable=False, index=True)
+    raffle_id = db.Column(
+        db.Integer, db.ForeignKey("raffles.id", ondelete="CASCADE"), nullable=False
+    )
+
+    outcome = db.Column(
+        SqlEnum(
+            SettlementOutcome,
+            name="settlement_outcome",
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=False,
+        default=SettlementOutcome.PENDING,
+    )
+    error = db.Column(db.String(400), nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    raffle = db.relationship("Raffle")
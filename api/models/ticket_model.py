@@ -7,6 +7,12 @@ from sqlalchemy import Enum as SqlEnum
 
 class Ticket(db.Model):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # A user's tickets in a raffle: checkout limits, raffle details, dashboard
+        db.Index("ix_tickets_raffle_id_user_id", "raffle_id", "user_id"),
+        # A user's tickets: my tickets page and its totals (covering)
+        db.Index("ix_tickets_user_id_status", "user_id", "status", "raffle_id", "price"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     raffle_id = db.Column(db.Integer, db.ForeignKey("raffles.id"), nullable=False)
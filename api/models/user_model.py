@@ -32,6 +32,11 @@ class User(db.Model):
         nullable=False,
     )
     last_login_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Unread messages, kept in step by services/notifications_service.py so the navbar
+    # badge needs no COUNT over messages
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Newest message id seen in the inbox - messages above it are shown as new
+    last_read_message_id = db.Column(db.Integer, nullable=True)
 
     # Relations
     raffles = db.relationship(
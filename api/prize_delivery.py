@@ -11,10 +11,7 @@ from flask import (
 from services.courier_service import ship_prize
 from forms.pickup_address_form import PickupAddressForm
 from services.prize_delivery_service import transition
-from services.notifications_service import (
-    queue_message_for_raffle,
-    send_external_notifications,
-)
+from services.notifications_service import queue_message_for_raffle
 from constants.countries import COUNTRIES
 from constants.delivery_status import PrizeDeliveryStatus
 from constants.message_category import MessageCategory
@@ -76,8 +73,9 @@ def provide_delivery_address(id):
         prize_delivery.delivery_phone = form.delivery_phone.data
         prize_delivery.delivery_country = form.delivery_country.data
 
-        # In-app message is DB state: stage it inside the transaction so it commits
-        # atomically with the address + status change. It's the creator's turn now.
+        # In-app message (and its email/SMS outbox rows) is DB state: stage it inside the
+        # transaction so it commits atomically with the address + status change. It's the
+        # creator's turn now.
         creator_message = (
             f"The winner provided their delivery address for raffle "
             f"'{prize_delivery.raffle.title}'. Please provide your pickup address "
@@ -100,9 +98,6 @@ def provide_delivery_address(id):
                 "delivery_address.html", form=form, prize_delivery=prize_delivery
             )
 
-        # External side effects: only after the state is durably committed.
-        send_external_notifications(prize_delivery.creator, creator_message)
-
         flash("Delivery address saved successfully", "success")
         return redirect(url_for("raffle_bp.get_raffle", id=prize_delivery.raffle_id))
 
@@ -184,8 +179,6 @@ def provide_pickup_address(id):
                 "pickup_address.html", form=form, prize_delivery=prize_delivery
             )
 
-        send_external_notifications(prize_delivery.winner, winner_message)
-
         if ship_prize(prize_delivery):
             delivered_message = (
                 f"Your prize for raffle '{prize_delivery.raffle.title}' has been "
@@ -203,8 +196,6 @@ def provide_pickup_address(id):
             except Exception as e:
                 db.session.rollback()
                 flash(f"Error notifying the winner: {str(e)}", "warning")
-            else:
-                send_external_notifications(prize_delivery.winner, delivered_message)
 
             flash("Pickup address saved successfully", "success")
         else:
@@ -1,4 +1,4 @@
-from datetime import date, datetime, time, timezone
+from datetime import date, datetime, timezone
 
 from flask import (
     Blueprint,
@@ -18,16 +18,36 @@ from utils.file_helpers import (
     get_valid_images,
     save_product_image,
 )
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from constants.product_condition import ProductCondition
 from constants.raffle_status import RaffleStatus
 from utils.helpers import is_safe_url, login_required
+from utils.identity import get_current_user
+from utils.pagination import (
+    paginate_keyset,
+    paginate_ranked_ids,
+    paginate_sorted_entries,
+)
+from utils.loader_profiles import loader_profile
 from forms.raffle_form import CreateRaffleForm, EditRaffleForm
 from models.raffle_model import Raffle
 from models.product_image_model import ProductImage
 from db import db
 from models.product_model import Product
 from models.ticket_model import Ticket
+from models.raffle_card_model import RaffleCard
+from services.raffle_card_service import refresh_raffle_card
+from services.raffle_query import ALLOWED_STATUSES, RAFFLE_SORTS, RaffleQuery
+from services.raffle_listing_service import (
+    count_listing,
+    creator_tag,
+    get_active_listing,
+    invalidate_raffle_listings,
+)
+from services.dashboard_stats_service import (
+    get_dashboard_stats,
+    invalidate_dashboard_stats,
+)
 
 USER_ROLE = "user"
 ADMIN_ROLE = "admin"
@@ -102,12 +122,14 @@ def create_raffle():
         # Save raffle in the db
         try:
             db.session.add(raffle)
+            refresh_raffle_card(raffle)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             flash(f"Error creating raffle: {str(e)}", "error")
             return render_template("/raffle/create_raffle.html", form=form)
 
+        invalidate_raffle_listings(creator_id=current_user_id)
         flash("Raffle created.", "success")
         return redirect(url_for("raffle_bp.get_raffle", id=raffle.id))
 
@@ -219,6 +241,7 @@ def update_raffle(id):
         # Save raffle in the db
         try:
             db.session.add(target_raffle)
+            refresh_raffle_card(target_raffle)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
@@ -230,6 +253,7 @@ def update_raffle(id):
                 next=next_url,
             )
 
+        invalidate_raffle_listings(creator_id=target_raffle.creator_id)
         flash("Raffle updated.", "success")
         return redirect(url_for("raffle_bp.get_raffle", id=target_raffle.id))
 
@@ -253,8 +277,8 @@ def update_raffle(id):
 def get_raffle(id):
     current_user_id = get_current_user_id()
 
-    user: User = User.query.get_or_404(current_user_id)
-    raffle: Raffle = Raffle.query.get_or_404(id)
+    user: User = get_current_user()
+    raffle: Raffle = Raffle.query.options(*loader_profile("detail")).get_or_404(id)
 
     is_admin = user.is_admin
     is_owner = raffle.creator_id == current_user_id
@@ -276,7 +300,7 @@ def get_raffle(id):
 @login_required
 def delete_raffle(id):
     current_user_id = get_current_user_id()
-    user: User = User.query.get_or_404(current_user_id)
+    user: User = get_current_user()
     is_admin = user.is_admin
 
     raffle: Raffle = Raffle.query.get_or_404(id)
@@ -292,6 +316,7 @@ def delete_raffle(id):
         for image in product.images:
             image_urls.append(image.image_url)
 
+    creator_id = raffle.creator_id
     try:
         db.session.delete(raffle)
         db.session.commit()
@@ -305,6 +330,7 @@ def delete_raffle(id):
         flash("Unable to delete the raffle", "error")
         return render_template("/raffle/raffle_details.html", raffle=raffle, user_ticket_count=0)
 
+    invalidate_raffle_listings(creator_id=creator_id)
     flash("Raffle deleted.", "success")
     return redirect("/")
 
@@ -316,7 +342,7 @@ def delete_raffle(id):
 @login_required
 def start_raffle(id):
     current_user_id = get_current_user_id()
-    user: User = User.query.get_or_404(current_user_id)
+    user: User = get_current_user()
     is_admin = user.is_admin
     raffle: Raffle = Raffle.query.get_or_404(id)
     is_raffle_creator = raffle.creator_id == current_user_id
@@ -340,7 +366,10 @@ def start_raffle(id):
     raffle.status = RaffleStatus.ACTIVE
 
     try:
+        refresh_raffle_card(raffle)
         db.session.commit()
+        invalidate_dashboard_stats()
+        invalidate_raffle_listings()
         flash("Raffle started", "success")
         return redirect(url_for("raffle_bp.get_raffle", id=raffle.id))
     except Exception as e:
@@ -357,179 +386,59 @@ def start_raffle(id):
 def my_raffles():
     user_id = get_current_user_id()
 
-    # Grab request args
-    page = request.args.get("page", 1, type=int)
-    page = max(page, 1)
-    per_page = request.args.get("per_page", 9, type=int)
-    per_page = min(max(per_page, 1), 9)
-
-    sort = request.args.get("sort", "newest")
-    search = request.args.get("search", "").strip()
-
-    selected_status = request.args.get("status_filter", "all")
-    start_date_filter = request.args.get("start_date", "").strip()
-    end_date_filter = request.args.get("end_date", "").strip()
-    min_price = request.args.get("min_price", type=int)
-    max_price = request.args.get("max_price", type=int)
-    category_filter = request.args.get("category")
-
-    # Only show current user's raffles
-    query = Raffle.query.filter(Raffle.creator_id == user_id)
-
-    # Filters
-    ## Status filter
-    allowed_statuses = ["all"] + [status.value for status in RaffleStatus]
-
-    if selected_status not in allowed_statuses:
-        selected_status = "all"
+    # Grab request args - search, filters, sort and page (services/raffle_query.py)
+    raffle_query = RaffleQuery(
+        request.args,
+        default_sort="newest",
+        max_per_page=9,
+        allowed_sorts=RAFFLE_SORTS,
+    )
+    for warning in raffle_query.warnings:
+        flash(warning, "warning")
 
     status_filter_options = [
-        {"value": status, "label": status.title()} for status in allowed_statuses
+        {"value": status, "label": status.title()} for status in ALLOWED_STATUSES
     ]
 
-    if selected_status != "all":
-        query = query.filter(Raffle.status == selected_status)
-
-    ## Date filter
-    start_date = None
-    end_date = None
-
-    if start_date_filter:
-        try:
-            start_date = datetime.strptime(start_date_filter, "%Y-%m-%d")
-        except ValueError:
-            start_date_filter = ""
+    # Only show current user's raffles
+    query, search_ids = raffle_query.compile(
+        Raffle.query.options(*loader_profile("card")).filter(
+            Raffle.creator_id == user_id
+        ),
+        Raffle,
+        Raffle.id,
+    )
 
-    if end_date_filter:
-        try:
-            end_date = datetime.strptime(end_date_filter, "%Y-%m-%d")
-            end_date = datetime.combine(end_date.date(), time.max)
-        except ValueError:
-            end_date_filter = ""
-
-    if start_date and end_date and start_date > end_date:
-        flash("Start date cannot be after end date.", "warning")
-        start_date = None
-        end_date = None
-        start_date_filter = ""
-        end_date_filter = ""
-
-    if start_date:
-        query = query.filter(Raffle.due_date >= start_date)
-
-    if end_date:
-        query = query.filter(Raffle.due_date <= end_date)
-
-    ## Price filter
-    if min_price is not None and min_price < 0:
-        min_price = None
-
-    if max_price is not None and max_price < 0:
-        max_price = None
-
-    if min_price is not None and max_price is not None and min_price > max_price:
-        flash("Minimum price cannot be greater than maximum price.", "warning")
-        min_price = None
-        max_price = None
-
-    if min_price is not None:
-        query = query.filter(Raffle.ticket_price >= min_price)
-
-    if max_price is not None:
-        query = query.filter(Raffle.ticket_price <= max_price)
-
-    ## Category filter
-    # TODO: implement this once categories are added to the raffle products
-    if category_filter:
-        pass
-
-    # Search
-    if search:
-        # search_pattern = f"%{search}%"
-        search_escaped = (
-            search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    # Cursor pagination on the sort key (see utils/pagination.py) - the total is cached
+    if raffle_query.sort == "relevance":
+        pagination = paginate_ranked_ids(
+            query, Raffle.id, search_ids, raffle_query.cursor, raffle_query.per_page
         )
-        search_pattern = f"%{search_escaped}%"
-
-        query = (
-            query.join(Product, Product.raffle_id == Raffle.id)
-            .filter(
-                or_(
-                    Raffle.title.ilike(search_pattern, escape="\\"),
-                    Raffle.description.ilike(search_pattern, escape="\\"),
-                    Product.name.ilike(search_pattern, escape="\\"),
-                    Product.description.ilike(search_pattern, escape="\\"),
-                )
-            )
-            .distinct()
+    else:
+        columns, descending = raffle_query.sort_key(Raffle, Raffle.id)
+        total = count_listing(
+            raffle_query,
+            ("my_raffles", user_id),
+            query,
+            tags=(creator_tag(user_id),),
+        )
+        pagination = paginate_keyset(
+            query,
+            columns,
+            descending,
+            raffle_query.cursor,
+            raffle_query.per_page,
+            total=total,
         )
 
-        # query = query.filter(
-        #     or_(
-        #         Raffle.title.ilike(search_pattern),
-        #         Raffle.description.ilike(search_pattern),
-        #         Raffle.products.any(
-        #             or_(
-        #                 Product.name.ilike(search_pattern),
-        #                 Product.description.ilike(search_pattern),
-        #             )
-        #         ),
-        #     )
-        # )
-
-    # Sorting - add the sorting options
-    # TODO: implement tickets_most, tickets_least, value_high, value_low
-    allowed_sorts = [
-        "newest",
-        "oldest",
-        "due_soon",
-        "price_low",
-        "price_high",
-        "tickets_most",
-        "tickets_least",
-        "value_high",
-        "value_low",
-    ]
-
-    if sort not in allowed_sorts:
-        sort = "newest"
-
-    if sort == "newest":
-        query = query.order_by(Raffle.created_at.desc())
-    elif sort == "oldest":
-        query = query.order_by(Raffle.created_at.asc())
-    elif sort == "due_soon":
-        query = query.order_by(Raffle.due_date.asc())
-    elif sort == "price_low":
-        query = query.order_by(Raffle.ticket_price.asc())
-    elif sort == "price_high":
-        query = query.order_by(Raffle.ticket_price.desc())
-    elif sort == "tickets_most":
-        pass
-    elif sort == "tickets_least":
-        pass
-    elif sort == "value_high":
-        pass
-    elif sort == "value_low":
-        pass
-
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     raffles: list[Raffle] = pagination.items
 
     return render_template(
         "raffle/my_raffles.html",
         raffles=raffles,
         pagination=pagination,
-        selected_status=selected_status,
-        selected_sort=sort,
-        search=search,
-        per_page=per_page,
-        start_date=start_date_filter,
-        end_date=end_date_filter,
-        min_price=min_price,
-        max_price=max_price,
         status_filter_options=status_filter_options,
-        allowed_sorts=allowed_sorts,
+        **raffle_query.template_context(),
     )
 
 
@@ -541,175 +450,45 @@ def my_raffles():
 @login_required
 def get_raffles():
     user_id = get_current_user_id()
-    user: User = User.query.get_or_404(user_id)
 
-    # Grab request args
-    page = request.args.get("page", 1, type=int)
-    page = max(page, 1)
-    per_page = request.args.get("per_page", 6, type=int)
-
-    per_page = min(max(per_page, 1), 6)
-
-    # Sort and search
-    sort = request.args.get("sort", "due_soon")
-    search = request.args.get("search", "").strip()
-
-    start_date_filter = request.args.get("start_date", "").strip()
-    end_date_filter = request.args.get("end_date", "").strip()
-    min_price = request.args.get("min_price", type=int)
-    max_price = request.args.get("max_price", type=int)
-    category_filter = request.args.get("category")
+    # Grab request args - search, filters, sort and page (services/raffle_query.py)
+    raffle_query = RaffleQuery(request.args, default_sort="due_soon", max_per_page=6)
+    for warning in raffle_query.warnings:
+        flash(warning, "warning")
 
     # TODO: Rethink this - I need to think better about this
     now = datetime.now(timezone.utc)
 
-    # Only show raffles that are not belonging to current user, status: ACTIVE, and not past due
-    # Base query - global truth
-    base_query = Raffle.query.filter(
-        Raffle.status == RaffleStatus.ACTIVE,
-        Raffle.creator_id != user_id,
-        Raffle.due_date >= now,
+    # Only show raffles with status: ACTIVE, and not past due - read from the
+    # raffle_cards projection. The query does not depend on the viewer so its result is
+    # shared (see services/raffle_listing_service.py); the viewer's own raffles are
+    # dropped below.
+    query = RaffleCard.query.filter(
+        RaffleCard.status == RaffleStatus.ACTIVE,
+        RaffleCard.due_date >= now,
     )
 
-    # Working query (user filters)
-    query = base_query
-
-    # Filters
-    ## Date filter
-    start_date = None
-    end_date = None
-
-    if start_date_filter:
-        try:
-            start_date = datetime.strptime(start_date_filter, "%Y-%m-%d")
-        except ValueError:
-            start_date_filter = ""
+    # Shared listing of (sort value, raffle id, creator id), cached process-wide
+    listing = get_active_listing(raffle_query, query)
+    _, descending = raffle_query.sort_key(RaffleCard, RaffleCard.raffle_id)
 
-    if end_date_filter:
-        try:
-            end_date = datetime.strptime(end_date_filter, "%Y-%m-%d")
-            end_date = datetime.combine(end_date.date(), time.max)
-        except ValueError:
-            end_date_filter = ""
-
-    if start_date and end_date and start_date > end_date:
-        flash("Start date cannot be after end date.", "warning")
-        start_date = None
-        end_date = None
-        start_date_filter = ""
-        end_date_filter = ""
-
-    if start_date:
-        query = query.filter(Raffle.due_date >= start_date)
-
-    if end_date:
-        query = query.filter(Raffle.due_date <= end_date)
-
-    ## Price filter
-    if min_price is not None and min_price < 0:
-        min_price = None
-
-    if max_price is not None and max_price < 0:
-        max_price = None
-
-    if min_price is not None and max_price is not None and min_price > max_price:
-        flash("Minimum price cannot be greater than maximum price.", "warning")
-        min_price = None
-        max_price = None
-
-    if min_price is not None:
-        query = query.filter(Raffle.ticket_price >= min_price)
-
-    if max_price is not None:
-        query = query.filter(Raffle.ticket_price <= max_price)
-
-    ## Category filter
-    # TODO: implement this once categories are added to the raffle products
-    if category_filter:
-        pass
-
-    # Search
-    if search:
-        # search_pattern = f"%{search}%"
-        search_escaped = (
-            search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-        )
-        search_pattern = f"%{search_escaped}%"
-
-        query = (
-            query.join(Product, Product.raffle_id == Raffle.id)
-            .filter(
-                or_(
-                    Raffle.title.ilike(search_pattern, escape="\\"),
-                    Raffle.description.ilike(search_pattern, escape="\\"),
-                    Product.name.ilike(search_pattern, escape="\\"),
-                    Product.description.ilike(search_pattern, escape="\\"),
-                )
-            )
-            .distinct()
-        )
+    # Drop the viewer's own raffles, then cursor-paginate the rest (utils/pagination.py)
+    visible_listing = [entry for entry in listing if entry[2] != user_id]
+    pagination = paginate_sorted_entries(
+        visible_listing, descending, raffle_query.cursor, raffle_query.per_page
+    )
 
-        # query = query.filter(
-        #     or_(
-        #         Raffle.title.ilike(search_pattern),
-        #         Raffle.description.ilike(search_pattern),
-        #         Raffle.products.any(
-        #             or_(
-        #                 Product.name.ilike(search_pattern),
-        #                 Product.description.ilike(search_pattern),
-        #             )
-        #         ),
-        #     )
-        # )
-
-    # Sorting - add the sorting options
-    # TODO: implement tickets_most, tickets_least, value_high, value_low
-    allowed_sorts = [
-        "newest",
-        "oldest",
-        "due_soon",
-        "price_low",
-        "price_high",
-        "tickets_most",
-        "tickets_least",
-        "value_high",
-        "value_low",
+    page_ids = [raffle_id for _, raffle_id, _ in pagination.items]
+    cards_by_id = {
+        card.raffle_id: card
+        for card in RaffleCard.query.filter(RaffleCard.raffle_id.in_(page_ids))
+    }
+    raffles: list[RaffleCard] = [
+        cards_by_id[raffle_id] for raffle_id in page_ids if raffle_id in cards_by_id
     ]
+    pagination.items = raffles
 
-    if sort not in allowed_sorts:
-        sort = "newest"
-
-    if sort == "newest":
-        query = query.order_by(Raffle.created_at.desc())
-    elif sort == "oldest":
-        query = query.order_by(Raffle.created_at.asc())
-    elif sort == "due_soon":
-        query = query.order_by(Raffle.due_date.asc())
-    elif sort == "price_low":
-        query = query.order_by(Raffle.ticket_price.asc())
-    elif sort == "price_high":
-        query = query.order_by(Raffle.ticket_price.desc())
-    elif sort == "tickets_most":
-        pass
-    elif sort == "tickets_least":
-        pass
-    elif sort == "value_high":
-        query = (
-            query.join(Raffle.products)
-            .group_by(Raffle.id)
-            .order_by(func.sum(Product.estimated_value).desc())
-        )
-    elif sort == "value_low":
-        query = (
-            query.join(Raffle.products)
-            .group_by(Raffle.id)
-            .order_by(func.sum(Product.estimated_value).asc())
-        )
-
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    raffles: list[Raffle] = pagination.items
-
-    raffle_ids = [r.id for r in raffles]
+    raffle_ids = [r.raffle_id for r in raffles]
     ticket_counts = (
         db.session.query(Ticket.raffle_id, func.count(Ticket.id))
         .filter(Ticket.user_id == user_id, Ticket.raffle_id.in_(raffle_ids))
@@ -719,48 +498,19 @@ def get_raffles():
     user_ticket_counts = {raffle_id: count for raffle_id, count in ticket_counts}
 
     # ----------------------------
-    # Stats (ALWAYS from base_query)
+    # Stats (global, cached - see services/dashboard_stats_service.py)
     # ----------------------------
-    today = datetime.now(timezone.utc).date()
-    today_start = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
-    today_end = datetime.combine(today, datetime.max.time(), tzinfo=timezone.utc)
-
-    ending_today_raffles = base_query.filter(
-        Raffle.due_date >= today_start,
-        Raffle.due_date <= today_end,
-    ).all()
-
-    total_active_raffles = base_query.count()
-    total_ending_today = len(ending_today_raffles)
-
-    total_prize_value = (
-        db.session.query(func.sum(Product.estimated_value))
-        .join(Raffle, Product.raffle_id == Raffle.id)
-        .filter(
-            Raffle.status == RaffleStatus.ACTIVE,
-            Raffle.creator_id != user_id,
-            Raffle.due_date >= now,
-        )
-        .scalar()
-        or 0
-    )
+    stats = get_dashboard_stats(user_id)
 
     return render_template(
         "index.html",
         raffles=raffles,
         pagination=pagination,
-        selected_sort=sort,
-        search=search,
-        per_page=per_page,
-        start_date=start_date_filter,
-        end_date=end_date_filter,
-        min_price=min_price,
-        max_price=max_price,
-        allowed_sorts=allowed_sorts,
-        total_active_raffles=total_active_raffles,
-        total_ending_today=total_ending_today,
-        total_prize_value=total_prize_value,
+        total_active_raffles=stats["active_raffles"],
+        total_ending_today=stats["ending_today"],
+        total_prize_value=stats["prize_value"],
         user_ticket_counts=user_ticket_counts,
+        **raffle_query.template_context(),
     )
 
 
@@ -779,9 +529,5 @@ def build_due_date(form):
     return due_date, None
 
 
-def get_current_user(id) -> User:
-    return User.query.get_or_404(id)
-
-
 def get_current_user_id() -> int:
     return session.get("user_id")
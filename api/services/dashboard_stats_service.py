@@ -0,0 +1,68 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import case, func, select
+from config import Config
+from constants.raffle_status import RaffleStatus
+from db import db
+from models.raffle_card_model import RaffleCard
+from utils.cache import TTLCache
+
+_stats_cache = TTLCache(ttl=Config.DASHBOARD_STATS_TTL_SECONDS)
+
+STAT_NAMES = ("active_raffles", "ending_today", "prize_value")
+
+
+def get_dashboard_stats(user_id: int) -> dict:
+    """Active raffles, raffles ending today and total prize value, excluding the user's
+    own raffles. Served from the cached global aggregates - no query on a warm cache.
+    """
+    today = datetime.now(timezone.utc).date()
+    totals, by_creator = _stats_cache.get_or_set(
+        today, lambda: compute_dashboard_stats(today)
+    )
+    own = by_creator.get(user_id, {})
+
+    return {name: totals[name] - own.get(name, 0) for name in STAT_NAMES}
+
+
+def compute_dashboard_stats(today: date) -> tuple[dict, dict]:
+    """Global dashboard aggregates and each creator's share, in one grouped query."""
+    now = datetime.now(timezone.utc)
+    today_start = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
+    today_end = datetime.combine(today, datetime.max.time(), tzinfo=timezone.utc)
+
+    ending_today = case(
+        (RaffleCard.due_date.between(today_start, today_end), 1), else_=0
+    )
+    rows = db.session.execute(
+        select(
+            RaffleCard.creator_id,
+            func.count(),
+            func.sum(ending_today),
+            func.sum(RaffleCard.total_estimated_value),
+        )
+        .where(
+            RaffleCard.status == RaffleStatus.ACTIVE,
+            RaffleCard.due_date >= now,
+        )
+        .group_by(RaffleCard.creator_id)
+    ).all()
+
+    # Every stat starts at 0 so an empty dashboard (no active raffles) still has them
+    totals = {name: 0 for name in STAT_NAMES}
+    by_creator = {}
+    for creator_id, active_raffles, ending, prize_value in rows:
+        stats = {
+            "active_raffles": active_raffles,
+            "ending_today": int(ending or 0),
+            "prize_value": int(prize_value or 0),
+        }
+        by_creator[creator_id] = stats
+        for name, value in stats.items():
+            totals[name] += value
+
+    return totals, by_creator
+
+
+def invalidate_dashboard_stats() -> None:
+    """Drop the cached aggregates, e.g. after a raffle starts or settles."""
+    _stats_cache.invalidate()
@@ -0,0 +1,47 @@
+import hashlib
+import secrets
+from models.raffle_model import Raffle
+from models.ticket_model import Ticket
+
+
+def ordinal_from_seed(seed: str, ticket_count: int) -> int:
+    """Map a hex seed to a ticket ordinal in [0, ticket_count).
+
+    Deterministic, so anyone holding the recorded seed and ticket count can re-derive
+    the winning ordinal. The modulo bias over a 256-bit digest is negligible.
+    """
+    digest = hashlib.sha256(bytes.fromhex(seed)).digest()
+    return int.from_bytes(digest, "big") % ticket_count
+
+
+def get_ticket_by_ordinal(raffle: Raffle, ordinal: int) -> Ticket | None:
+    # Tickets are ordered by id, so an ordinal always points at the same ticket.
+    return (
+        Ticket.query.filter(Ticket.raffle_id == raffle.id)
+        .order_by(Ticket.id)
+        .offset(ordinal)
+        .limit(1)
+        .first()
+    )
+
+
+def draw_winner_ticket(raffle: Raffle, tickets_sold: int) -> Ticket | None:
+    """Draw the winning ticket from the sold-ticket count, loading only that ticket.
+
+    Records the seed, ordinal and ticket count on the raffle (in the current
+    transaction) so the draw can be audited later.
+    """
+    if tickets_sold < 1:
+        return None
+
+    seed = secrets.token_hex(32)
+    ordinal = ordinal_from_seed(seed, tickets_sold)
+
+    winner_ticket = get_ticket_by_ordinal(raffle, ordinal)
+    if winner_ticket is None:
+        return None
+
+    raffle.draw_seed = seed
+    raffle.draw_ticket_ordinal = ordinal
+    raffle.draw_ticket_count = tickets_sold
+    return winner_ticket
@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from db import db
+from models.archived_message_model import ArchivedMessage
+from models.message_model import Message
+
+# Columns copied from messages into message_archive (all of them but is_read)
+ARCHIVED_COLUMNS = [
+    "id",
+    "user_id",
+    "raffle_id",
+    "ticket_id",
+    "prize_delivery_id",
+    "broadcast_id",
+    "body",
+    "category",
+    "created_at",
+]
+
+
+def archive_read_messages_chunk(
+    cutoff: datetime, after_id: int, chunk_size: int
+) -> tuple[int, int]:
+    """Archive the read messages created before cutoff among the next chunk_size ids.
+
+    The chunk is the primary key range after_id + 1 .. after_id + chunk_size, so it
+    reads at most chunk_size rows however few of them match. The copy and the delete
+    run in one transaction; the caller commits. Returns (messages moved, last id of
+    the range) - the walk goes on from there, even when nothing in the range matched.
+    """
+    last_id = after_id + chunk_size
+    ids = db.session.scalars(
+        select(Message.id).where(
+            Message.id.between(after_id + 1, last_id),
+            Message.is_read.is_(True),
+            Message.created_at < cutoff,
+        )
+    ).all()
+    if not ids:
+        return 0, last_id
+
+    db.session.execute(
+        insert(ArchivedMessage).from_select(
+            ARCHIVED_COLUMNS,
+            select(*(getattr(Message, column) for column in ARCHIVED_COLUMNS)).where(
+                Message.id.in_(ids)
+            ),
+        )
+    )
+    db.session.execute(
+        delete(Message)
+        .where(Message.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    return len(ids), last_id
+
+
+def last_message_id() -> int:
+    """Highest id in the messages table, 0 when it is empty."""
+    return db.session.scalar(select(func.max(Message.id))) or 0
+
+
+def has_archived_messages(user_id: int) -> bool:
+    """Whether the user has archived messages (one index lookup)."""
+    archived_id = db.session.scalar(
+        select(ArchivedMessage.id).where(ArchivedMessage.user_id == user_id).limit(1)
+    )
+    return archived_id is not None
@@ -1,31 +1,269 @@
+import asyncio
+import smtplib
+from email.message import EmailMessage
+from flask import current_app
+from collections import Counter, defaultdict
+from sqlalchemy import func, insert, update
 from models.prize_delivery_model import PrizeDelivery
 from db import db
+from constants.notification_channel import NotificationChannel
 from models.user_model import User
 from models.raffle_model import Raffle
 from models.ticket_model import Ticket
 from models.message_model import Message
+from models.broadcast_message_model import BroadcastMessage
+from models.notification_outbox_model import NotificationOutbox
+from utils.identity import invalidate_user
 
 
 # ----------------------------
-# External channels (call AFTER commit)
+# External channels (called by the outbox dispatcher, see jobs/notifications_dispatcher.py)
 # ----------------------------
-def notify_by_email(user: User, message: str) -> bool:
-    # TODO: Implement this when an email provider is integrated
-    print(f"Sending email to {user.email}: {message}")
+def notify_by_email(email: str, message: str) -> bool:
+    # Used when no SMTP server is configured (see Config.SMTP_HOST)
+    print(f"Sending email to {email}: {message}")
     return True
 
 
-def notify_by_sms(user: User, message: str) -> bool:
+def notify_by_sms(phone: str, message: str) -> bool:
     # TODO: Implement this when an SMS provider is integrated
-    print(f"Sending SMS to {user.phone}: {message}")
+    print(f"Sending SMS to {phone}: {message}")
     return True
 
 
-def send_external_notifications(user: User, message: str) -> bool:
-    """Fire the external channels. Call only after the triggering transaction commits."""
-    email_sent = notify_by_email(user, message)
-    sms_sent = notify_by_sms(user, message)
-    return email_sent and sms_sent
+def notify_by_sms_batch(messages: list[tuple[str, str]]) -> bool:
+    # Not batched yet: sends one SMS per message. TODO: use the provider's bulk
+    # endpoint when an SMS provider is integrated
+    for phone, message in messages:
+        notify_by_sms(phone, message)
+    return True
+
+
+class RateLimiter:
+    """Spaces out provider calls so a channel never exceeds rate_per_second."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 1) -> None:
+        if not self.interval:
+            return
+
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            now = loop.time()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval * tokens
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class SmtpConnectionPool:
+    """Up to `size` SMTP connections, opened lazily and reused across sends."""
+
+    def __init__(self, config: dict, size: int):
+        self.config = config
+        self.size = size
+        self.created = 0
+        self.idle = asyncio.Queue()
+
+    def connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(
+            self.config["SMTP_HOST"], self.config["SMTP_PORT"], timeout=30
+        )
+        if self.config["SMTP_USE_TLS"]:
+            smtp.starttls()
+        if self.config["SMTP_USERNAME"]:
+            smtp.login(self.config["SMTP_USERNAME"], self.config["SMTP_PASSWORD"])
+        return smtp
+
+    async def acquire(self) -> smtplib.SMTP:
+        while True:
+            if self.idle.empty() and self.created < self.size:
+                self.created += 1
+                try:
+                    return await asyncio.to_thread(self.connect)
+                except BaseException:
+                    self.release_slot()
+                    raise
+            smtp = await self.idle.get()
+            # None marks a freed slot (see release_slot) - try again
+            if smtp is not None:
+                return smtp
+
+    def release_slot(self) -> None:
+        # Wakes a send waiting for an idle connection so it can open a new one
+        self.created -= 1
+        self.idle.put_nowait(None)
+
+    async def send(self, email_message: EmailMessage) -> None:
+        smtp = await self.acquire()
+        try:
+            try:
+                await asyncio.to_thread(smtp.send_message, email_message)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection - reconnect once and retry
+                await self.quit(smtp)
+                smtp = None
+                smtp = await asyncio.to_thread(self.connect)
+                await asyncio.to_thread(smtp.send_message, email_message)
+        except BaseException:
+            # Only a connection that just sent successfully goes back to the pool;
+            # a failed one is closed and its slot freed for a fresh connection
+            if smtp is not None:
+                await self.quit(smtp)
+            self.release_slot()
+            raise
+        self.idle.put_nowait(smtp)
+
+    async def quit(self, smtp: smtplib.SMTP) -> None:
+        try:
+            await asyncio.to_thread(smtp.quit)
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    async def close(self) -> None:
+        while not self.idle.empty():
+            smtp = self.idle.get_nowait()
+            if smtp is not None:
+                await self.quit(smtp)
+
+
+def send_notifications(
+    notifications: list[NotificationOutbox],
+) -> dict[int, tuple[bool, str | None]]:
+    """Send a batch of outbox rows concurrently. Returns {id: (sent, error)}.
+
+    Emails go out over a small pool of reused SMTP connections (still one message per
+    send), SMS grouped in NOTIFY_SMS_BATCH_SIZE chunks, each channel behind its own
+    rate limit and all of it behind one concurrency bound. SMS batching is not
+    implemented by any provider yet: notify_by_sms_batch sends each message on its own.
+    """
+    items = [(n.id, n.channel, n.recipient, n.body) for n in notifications]
+    config = {
+        key: current_app.config[key]
+        for key in (
+            "SMTP_HOST",
+            "SMTP_PORT",
+            "SMTP_USERNAME",
+            "SMTP_PASSWORD",
+            "SMTP_USE_TLS",
+            "SMTP_FROM",
+            "NOTIFY_SMTP_POOL_SIZE",
+            "NOTIFY_MAX_CONCURRENCY",
+            "NOTIFY_EMAIL_RATE_PER_SECOND",
+            "NOTIFY_SMS_RATE_PER_SECOND",
+            "NOTIFY_SMS_BATCH_SIZE",
+        )
+    }
+    return asyncio.run(send_notifications_async(items, config))
+
+
+async def send_notifications_async(
+    items: list[tuple], config: dict
+) -> dict[int, tuple[bool, str | None]]:
+    results: dict[int, tuple[bool, str | None]] = {}
+    concurrency = asyncio.Semaphore(config["NOTIFY_MAX_CONCURRENCY"])
+    email_limiter = RateLimiter(config["NOTIFY_EMAIL_RATE_PER_SECOND"])
+    sms_limiter = RateLimiter(config["NOTIFY_SMS_RATE_PER_SECOND"])
+    smtp_pool = None
+    if config["SMTP_HOST"]:
+        smtp_pool = SmtpConnectionPool(config, config["NOTIFY_SMTP_POOL_SIZE"])
+
+    async def send_email(notification_id, recipient, body):
+        async with concurrency:
+            await email_limiter.acquire()
+            try:
+                if smtp_pool is None:
+                    sent = notify_by_email(recipient, body)
+                else:
+                    email_message = EmailMessage()
+                    email_message["From"] = config["SMTP_FROM"]
+                    email_message["To"] = recipient
+                    email_message["Subject"] = "Raffle notification"
+                    email_message.set_content(body)
+                    await smtp_pool.send(email_message)
+                    sent = True
+                results[notification_id] = (sent, None if sent else "Email not sent")
+            except Exception as e:
+                results[notification_id] = (False, str(e))
+
+    async def send_sms_batch(batch):
+        async with concurrency:
+            await sms_limiter.acquire(len(batch))
+            try:
+                messages = [(recipient, body) for _, recipient, body in batch]
+                sent = await asyncio.to_thread(notify_by_sms_batch, messages)
+                error = None if sent else "SMS batch not sent"
+            except Exception as e:
+                sent, error = False, str(e)
+            for notification_id, _, _ in batch:
+                results[notification_id] = (sent, error)
+
+    tasks = []
+    sms_items = []
+    for notification_id, channel, recipient, body in items:
+        if channel == NotificationChannel.EMAIL:
+            tasks.append(send_email(notification_id, recipient, body))
+        elif channel == NotificationChannel.SMS:
+            sms_items.append((notification_id, recipient, body))
+        else:
+            results[notification_id] = (False, f"Unknown channel {channel}")
+
+    batch_size = config["NOTIFY_SMS_BATCH_SIZE"]
+    for start in range(0, len(sms_items), batch_size):
+        tasks.append(send_sms_batch(sms_items[start : start + batch_size]))
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        if smtp_pool is not None:
+            await smtp_pool.close()
+
+    return results
+
+
+# ----------------------------
+# Outbox (stage BEFORE commit)
+# ----------------------------
+def build_outbox_rows(user, message: str) -> list[dict]:
+    """One outbox row per external channel the user can be reached on.
+
+    user only needs `id`, `email` and `phone` attributes (User objects or rows).
+    """
+    rows = []
+    if user.email:
+        rows.append(
+            {
+                "user_id": user.id,
+                "channel": NotificationChannel.EMAIL,
+                "recipient": user.email,
+                "body": message,
+            }
+        )
+    if user.phone:
+        rows.append(
+            {
+                "user_id": user.id,
+                "channel": NotificationChannel.SMS,
+                "recipient": user.phone,
+                "body": message,
+            }
+        )
+    return rows
+
+
+def queue_external_notifications(user: User, message: str) -> None:
+    """Stage the email/SMS for the user in the outbox, in the current transaction.
+
+    Nothing is sent here: the dispatcher picks the rows up once the transaction
+    commits, so external channels never fire for a rolled-back transaction.
+    """
+    for row in build_outbox_rows(user, message):
+        db.session.add(NotificationOutbox(**row))
 
 
 # ----------------------------
@@ -38,11 +276,13 @@ def queue_message(
     ticket_id: int = None,
     prize_delivery=None,
     category: str = None,
+    notify_external: bool = True,
 ) -> None:
     """Stage the in-app Message row in the current transaction (before commit).
 
     category ("win" | "loss" | "info") is the sender's declared sentiment; the UI
-    uses it to tint the row. Leave None for a neutral message.
+    uses it to tint the row. Leave None for a neutral message. Unless
+    notify_external is False, the email/SMS copies are staged in the outbox too.
     """
     db.session.add(
         Message(
@@ -54,6 +294,9 @@ def queue_message(
             category=category,
         )
     )
+    increment_unread_counts([user.id])
+    if notify_external:
+        queue_external_notifications(user, message)
     print(f"Message queued for user {user.id}: {message}")
 
 
@@ -87,3 +330,99 @@ def queue_message_for_ticket(
         prize_delivery=prize_delivery,
         category=category,
     )
+
+
+def queue_messages_for_raffle(
+    users: list,
+    message: str,
+    raffle: Raffle,
+    category: str = None,
+) -> None:
+    """Stage the same raffle message for many users as a broadcast.
+
+    The text is stored once (BroadcastMessage); each user gets a body-less Message
+    receipt, all inserted with a single multi-row INSERT. users only need `id`,
+    `email` and `phone` attributes (User objects or rows), so settlement can message
+    every participant without loading them into the session. Their outbox rows go in
+    with one more multi-row INSERT.
+    """
+    if not users:
+        return
+
+    broadcast = BroadcastMessage(raffle_id=raffle.id, body=message)
+    db.session.add(broadcast)
+    db.session.flush()
+
+    db.session.execute(
+        insert(Message),
+        [
+            {
+                "user_id": user.id,
+                "broadcast_id": broadcast.id,
+                "raffle_id": raffle.id,
+                "category": category,
+            }
+            for user in users
+        ],
+    )
+    increment_unread_counts([user.id for user in users])
+
+    outbox_rows = [row for user in users for row in build_outbox_rows(user, message)]
+    if outbox_rows:
+        db.session.execute(insert(NotificationOutbox), outbox_rows)
+    print(f"Message broadcast to {len(users)} user(s): {message}")
+
+
+# ----------------------------
+# Unread counters (User.unread_count, read by the navbar badge)
+# ----------------------------
+def increment_unread_counts(user_ids: list) -> None:
+    """Add one unread message per occurrence of each id, in the current transaction."""
+    # One UPDATE per distinct increment - a single one for the usual one-message-each
+    counts = Counter(user_ids)
+    ids_by_increment = defaultdict(list)
+    for user_id, increment in counts.items():
+        ids_by_increment[increment].append(user_id)
+
+    for increment, ids in ids_by_increment.items():
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(ids))
+            .values(unread_count=User.unread_count + increment)
+        )
+
+    # Bulk UPDATEs skip the ORM events that refresh the cached current user - drop it
+    # once the transaction commits
+    for user_id in counts:
+        invalidate_user(user_id)
+
+
+def mark_messages_read(user_id: int, up_to_id: int) -> int:
+    """Mark the user's messages up to up_to_id read, in the current transaction.
+
+    One set-based UPDATE over the unread rows (ix_messages_user_id_is_read_created_at);
+    the user's unread count drops by the rows it touched and the inbox watermark moves
+    up to up_to_id. Returns the number of messages marked read.
+    """
+    read = db.session.execute(
+        update(Message)
+        .where(
+            Message.user_id == user_id,
+            Message.is_read.is_(False),
+            Message.id <= up_to_id,
+        )
+        .values(is_read=True)
+    ).rowcount
+
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            unread_count=func.greatest(User.unread_count - read, 0),
+            last_read_message_id=func.greatest(
+                func.coalesce(User.last_read_message_id, 0), up_to_id
+            ),
+        )
+    )
+    invalidate_user(user_id)
+    return read
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from constants.raffle_status import RaffleStatus
+from db import db
+from exceptions.purchase_exceptions import RaffleNotOpen, TicketLimitReached
+from models.raffle_model import Raffle
+from models.raffle_user_ticket_count_model import RaffleUserTicketCount
+from models.ticket_model import Ticket
+from services.ticket_counter_service import (
+    increment_ticket_counter_shard,
+    increment_tickets_sold,
+)
+
+
+def get_user_ticket_count(raffle_id: int, user_id: int) -> int:
+    """Tickets the user holds in the raffle (primary key lookup, no COUNT)."""
+    count = db.session.scalar(
+        select(RaffleUserTicketCount.count).where(
+            RaffleUserTicketCount.raffle_id == raffle_id,
+            RaffleUserTicketCount.user_id == user_id,
+        )
+    )
+    return count or 0
+
+
+def purchase_tickets(raffle: Raffle, user_id: int, quantity: int) -> None:
+    """Stage quantity tickets of raffle for the user, in the current transaction.
+
+    - The raffle must still be ACTIVE and not due, checked against the locked row so
+      tickets can't land on a raffle settlement has claimed (FOR UPDATE).
+    - tickets_sold and the card are bumped by one atomic UPDATE of the raffle row,
+      which doubles as that check. Hot raffles (ticket_counter_shards > 0) only take a
+      shared lock on the raffle - buyers don't wait on each other - and bump a counter
+      shard instead, folded into tickets_sold by reconcile-ticket-counts --watch.
+    - The per-user limit is claimed with one conditional UPDATE of the buyer's own
+      (raffle, user) counter row.
+    - The tickets go in with a single multi-row INSERT.
+
+    Raises RaffleNotOpen or TicketLimitReached; the caller commits or rolls back.
+    """
+    is_sharded = raffle.ticket_counter_shards > 0
+    if is_sharded:
+        is_open = db.session.scalar(
+            select(Raffle.id)
+            .where(
+                Raffle.id == raffle.id,
+                Raffle.status == RaffleStatus.ACTIVE,
+                Raffle.due_date > datetime.now(timezone.utc),
+            )
+            .with_for_update(read=True)
+        )
+    else:
+        is_open = increment_tickets_sold(raffle.id, quantity)
+    if not is_open:
+        raise RaffleNotOpen()
+
+    # Make sure the counter row exists (no-op when it does), then claim the tickets
+    statement = mysql_insert(RaffleUserTicketCount).values(
+        raffle_id=raffle.id, user_id=user_id, count=0
+    )
+    db.session.execute(
+        statement.on_duplicate_key_update(count=RaffleUserTicketCount.count)
+    )
+    claimed = db.session.execute(
+        update(RaffleUserTicketCount)
+        .where(
+            RaffleUserTicketCount.raffle_id == raffle.id,
+            RaffleUserTicketCount.user_id == user_id,
+            RaffleUserTicketCount.count + quantity <= raffle.maximum_tickets_per_user,
+        )
+        .values(count=RaffleUserTicketCount.count + quantity)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        raise TicketLimitReached()
+
+    db.session.execute(
+        insert(Ticket),
+        [
+            {"raffle_id": raffle.id, "user_id": user_id, "price": raffle.ticket_price}
+            for _ in range(quantity)
+        ],
+    )
+    if is_sharded:
+        increment_ticket_counter_shard(
+            raffle.id, raffle.ticket_counter_shards, quantity
+        )
@@ -0,0 +1,141 @@
+from sqlalchemy import inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import joinedload, selectinload
+from db import db
+from constants.raffle_status import RaffleStatus
+from models.raffle_model import Raffle
+from models.product_model import Product
+from models.raffle_card_model import RaffleCard
+from models.user_model import User
+
+
+def build_raffle_card_row(raffle: Raffle) -> dict:
+    """Card columns of a raffle, from its products, their images and its creator."""
+    products = live_objects(raffle.products)
+    cover_product = products[0] if products else None
+    cover_images = live_objects(cover_product.images) if cover_product else []
+    cover_image = cover_images[0] if cover_images else None
+
+    return {
+        "raffle_id": raffle.id,
+        "creator_id": raffle.creator_id,
+        "status": raffle.status,
+        "title": raffle.title,
+        "description": raffle.description,
+        "ticket_price": raffle.ticket_price,
+        "minimum_required_tickets": raffle.minimum_required_tickets,
+        "maximum_tickets_per_user": raffle.maximum_tickets_per_user,
+        "due_date": raffle.due_date,
+        "created_at": raffle.created_at,
+        "cover_image_url": cover_image.image_url if cover_image else None,
+        "cover_product_name": cover_product.name if cover_product else None,
+        "creator_name": build_creator_name(raffle.creator),
+        "total_estimated_value": sum(
+            product.estimated_value or 0 for product in products
+        ),
+        "tickets_sold": raffle.tickets_sold or 0,
+    }
+
+
+# Products and images deleted with session.delete() stay in their collection until the
+# transaction ends; the card must not pick them up
+def live_objects(objects: list) -> list:
+    return [obj for obj in objects if not inspect(obj).deleted]
+
+
+def build_creator_name(user: User) -> str:
+    return f"{user.first_name} {user.last_name}"
+
+
+def refresh_raffle_card(raffle: Raffle) -> None:
+    """Insert or rewrite the raffle's card, in the current transaction.
+
+    The raffle must be flushed (it needs an id and its current products).
+    """
+    db.session.flush()
+    row = build_raffle_card_row(raffle)
+    statement = mysql_insert(RaffleCard).values(**row)
+    db.session.execute(
+        statement.on_duplicate_key_update(
+            {
+                column: statement.inserted[column]
+                for column in row
+                if column != "raffle_id"
+            }
+        )
+    )
+
+
+def set_raffle_card_status(raffle_id: int, status: RaffleStatus) -> None:
+    db.session.execute(
+        update(RaffleCard)
+        .where(RaffleCard.raffle_id == raffle_id)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def increment_card_tickets_sold(raffle_id: int, quantity: int) -> None:
+    db.session.execute(
+        update(RaffleCard)
+        .where(RaffleCard.raffle_id == raffle_id)
+        .values(tickets_sold=RaffleCard.tickets_sold + quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sync_card_tickets_sold(raffle_ids: list[int]) -> None:
+    """Copy raffles.tickets_sold onto the cards of the given raffles."""
+    if not raffle_ids:
+        return
+
+    tickets_sold = (
+        select(Raffle.tickets_sold)
+        .where(Raffle.id == RaffleCard.raffle_id)
+        .correlate(RaffleCard)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(RaffleCard)
+        .where(RaffleCard.raffle_id.in_(raffle_ids))
+        .values(tickets_sold=tickets_sold)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rename_creator_on_cards(user: User) -> None:
+    db.session.execute(
+        update(RaffleCard)
+        .where(RaffleCard.creator_id == user.id)
+        .values(creator_name=build_creator_name(user))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_raffle_cards(batch_size: int = 500) -> int:
+    """Rewrite every raffle's card, in raffle id batches. Returns the cards written."""
+    rebuilt = 0
+    last_id = 0
+    while True:
+        raffles = (
+            Raffle.query.options(
+                selectinload(Raffle.products).selectinload(Product.images),
+                joinedload(Raffle.creator),
+            )
+            .filter(Raffle.id > last_id)
+            .order_by(Raffle.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not raffles:
+            break
+
+        for raffle in raffles:
+            refresh_raffle_card(raffle)
+        db.session.commit()
+
+        rebuilt += len(raffles)
+        last_id = raffles[-1].id
+        db.session.expunge_all()
+
+    return rebuilt
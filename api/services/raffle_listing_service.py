@@ -0,0 +1,87 @@
+from config import Config
+from models.raffle_card_model import RaffleCard
+from utils.cache import TTLCache
+
+# Every cached listing and count is tagged RAFFLES_TAG plus, for the personal listings,
+# the tag of their owner - see invalidate_raffle_listings
+RAFFLES_TAG = "raffles"
+
+_listing_cache = TTLCache(
+    ttl=Config.LISTING_CACHE_TTL_SECONDS, max_size=Config.LISTING_CACHE_SIZE
+)
+_count_cache = TTLCache(
+    ttl=Config.PAGINATION_COUNT_TTL_SECONDS, max_size=Config.PAGINATION_COUNT_CACHE_SIZE
+)
+
+
+def creator_tag(user_id: int) -> str:
+    return f"creator:{user_id}"
+
+
+def buyer_tag(user_id: int) -> str:
+    return f"buyer:{user_id}"
+
+
+def get_active_listing(raffle_query, query) -> list[tuple]:
+    """The dashboard listing for one RaffleQuery, shared by every viewer:
+    (sort value, raffle id, creator id) tuples sorted ascending, cached for
+    LISTING_CACHE_TTL_SECONDS.
+
+    query must not depend on the viewer - each viewer's own raffles are dropped from
+    the cached list when their page is assembled. Relevance sorts by search rank.
+    Free-text searches are not cached - their keys would be unbounded and rarely reused.
+    """
+    if raffle_query.search:
+        return build_active_listing(raffle_query, query)
+
+    return _listing_cache.get_or_set(
+        raffle_query.cache_key,
+        lambda: build_active_listing(raffle_query, query),
+        tags=(RAFFLES_TAG,),
+    )
+
+
+def build_active_listing(raffle_query, query) -> list[tuple]:
+    query, search_ids = raffle_query.compile(query, RaffleCard, RaffleCard.raffle_id)
+
+    if raffle_query.sort == "relevance":
+        rank = {raffle_id: position for position, raffle_id in enumerate(search_ids)}
+        rows = query.with_entities(RaffleCard.raffle_id, RaffleCard.creator_id).all()
+        return sorted(
+            (rank[raffle_id], raffle_id, creator_id) for raffle_id, creator_id in rows
+        )
+
+    columns, _ = raffle_query.sort_key(RaffleCard, RaffleCard.raffle_id)
+    sort_column = columns[0]
+    rows = (
+        query.with_entities(sort_column, RaffleCard.raffle_id, RaffleCard.creator_id)
+        .order_by(sort_column.asc(), RaffleCard.raffle_id.asc())
+        .all()
+    )
+    return [tuple(row) for row in rows]
+
+
+def count_listing(raffle_query, scope: tuple, query, tags=()) -> int:
+    """Total rows of a listing query, cached for PAGINATION_COUNT_TTL_SECONDS per scope
+    (e.g. ("my_raffles", user_id)) and RaffleQuery - except for free-text searches.
+    """
+    count = query.order_by(None).count
+    if raffle_query.search:
+        return count()
+
+    return _count_cache.get_or_set(
+        scope + raffle_query.cache_key, count, tags=(RAFFLES_TAG, *tags)
+    )
+
+
+def invalidate_raffle_listings(creator_id: int = None, buyer_id: int = None) -> None:
+    """Drop the cached listings and counts a change affects: those of the given
+    creator / buyer, or all of them (e.g. after a raffle starts or settles)."""
+    tags = []
+    if creator_id is not None:
+        tags.append(creator_tag(creator_id))
+    if buyer_id is not None:
+        tags.append(buyer_tag(buyer_id))
+
+    for cache in (_listing_cache, _count_cache):
+        cache.invalidate_tags(*(tags or [RAFFLES_TAG]))
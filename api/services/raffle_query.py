@@ -0,0 +1,186 @@
+from datetime import datetime, time
+from constants.raffle_status import RaffleStatus
+from services.search_service import search_raffle_ids
+
+ALLOWED_SORTS = [
+    "newest",
+    "oldest",
+    "due_soon",
+    "price_low",
+    "price_high",
+    "tickets_most",
+    "tickets_least",
+    "value_high",
+    "value_low",
+    "relevance",
+]
+
+# Sorts of the listings paged over Raffle rather than RaffleCard (my_raffles) - the
+# total prize value only lives on the card
+RAFFLE_SORTS = [
+    sort for sort in ALLOWED_SORTS if sort not in ("value_high", "value_low")
+]
+
+# Sort option -> (column name, descending), resolved on the listing's model. The value
+# sorts only exist on RaffleCard - Raffle listings must not allow them (RAFFLE_SORTS).
+SORT_COLUMNS = {
+    "newest": ("created_at", True),
+    "oldest": ("created_at", False),
+    "due_soon": ("due_date", False),
+    "price_low": ("ticket_price", False),
+    "price_high": ("ticket_price", True),
+    "tickets_most": ("tickets_sold", True),
+    "tickets_least": ("tickets_sold", False),
+    "value_high": ("total_estimated_value", True),
+    "value_low": ("total_estimated_value", False),
+}
+
+ALLOWED_STATUSES = ["all"] + [status.value for status in RaffleStatus]
+
+
+class RaffleQuery:
+    """The search, filters, sort and page of a raffle listing, parsed and normalized
+    from the request args once for get_raffles, my_raffles and my_tickets.
+
+    Invalid values are reset (and explained in warnings, to be flashed) so equal
+    listings always get the same cache_key.
+    """
+
+    def __init__(self, args, default_sort, max_per_page, allowed_sorts=ALLOWED_SORTS):
+        self.warnings = []
+        self.allowed_sorts = allowed_sorts
+
+        self.cursor = args.get("cursor")
+        self.per_page = min(
+            max(args.get("per_page", max_per_page, type=int), 1), max_per_page
+        )
+        self.search = args.get("search", "").strip()
+
+        self.sort = args.get("sort", default_sort)
+        if self.sort not in allowed_sorts or (
+            self.sort == "relevance" and not self.search
+        ):
+            self.sort = default_sort
+
+        self.status = args.get("status_filter", "all")
+        if self.status not in ALLOWED_STATUSES:
+            self.status = "all"
+
+        # TODO: implement this once categories are added to the raffle products
+        self.category = args.get("category")
+
+        self.parse_dates(args)
+        self.parse_prices(args)
+
+    def parse_dates(self, args):
+        self.start_date_filter = args.get("start_date", "").strip()
+        self.end_date_filter = args.get("end_date", "").strip()
+        self.start_date = None
+        self.end_date = None
+
+        if self.start_date_filter:
+            try:
+                self.start_date = datetime.strptime(self.start_date_filter, "%Y-%m-%d")
+            except ValueError:
+                self.start_date_filter = ""
+
+        if self.end_date_filter:
+            try:
+                end_date = datetime.strptime(self.end_date_filter, "%Y-%m-%d")
+                self.end_date = datetime.combine(end_date.date(), time.max)
+            except ValueError:
+                self.end_date_filter = ""
+
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            self.warnings.append("Start date cannot be after end date.")
+            self.start_date = None
+            self.end_date = None
+            self.start_date_filter = ""
+            self.end_date_filter = ""
+
+    def parse_prices(self, args):
+        self.min_price = args.get("min_price", type=int)
+        self.max_price = args.get("max_price", type=int)
+
+        if self.min_price is not None and self.min_price < 0:
+            self.min_price = None
+
+        if self.max_price is not None and self.max_price < 0:
+            self.max_price = None
+
+        if (
+            self.min_price is not None
+            and self.max_price is not None
+            and self.min_price > self.max_price
+        ):
+            self.warnings.append("Minimum price cannot be greater than maximum price.")
+            self.min_price = None
+            self.max_price = None
+
+    @property
+    def cache_key(self) -> tuple:
+        """Identifies the listing (not the page) - equal for equal normalized args."""
+        return (
+            self.search,
+            self.sort,
+            self.status,
+            self.start_date_filter,
+            self.end_date_filter,
+            self.min_price,
+            self.max_price,
+        )
+
+    def apply_filters(self, query, model):
+        """query filtered by status, due date range and ticket price range of model
+        (Raffle or RaffleCard, which share these columns)."""
+        if self.status != "all":
+            query = query.filter(model.status == self.status)
+        if self.start_date:
+            query = query.filter(model.due_date >= self.start_date)
+        if self.end_date:
+            query = query.filter(model.due_date <= self.end_date)
+        if self.min_price is not None:
+            query = query.filter(model.ticket_price >= self.min_price)
+        if self.max_price is not None:
+            query = query.filter(model.ticket_price <= self.max_price)
+        return query
+
+    def compile(self, query, model, id_column):
+        """The listing statement: filters plus the full-text search restricted to them
+        (see services/search_service.py). Returns (query, ranked search ids)."""
+        query = self.apply_filters(query, model)
+
+        search_ids = []
+        if self.search:
+            search_ids = search_raffle_ids(
+                self.search, scope=query.with_entities(id_column).statement
+            )
+            query = query.filter(id_column.in_(search_ids))
+
+        return query, search_ids
+
+    def sort_key(self, model, id_column) -> tuple[list, bool]:
+        """(keyset columns ending with id_column, descending) of the selected sort.
+        Relevance has no column - it gives ([id_column], False). Raises ValueError when
+        model has no column for the sort."""
+        if self.sort not in SORT_COLUMNS:
+            return [id_column], False
+
+        column_name, descending = SORT_COLUMNS[self.sort]
+        column = getattr(model, column_name, None)
+        if column is None:
+            raise ValueError(f"{model.__name__} can't be sorted by {self.sort}")
+        return [column, id_column], descending
+
+    def template_context(self) -> dict:
+        return {
+            "search": self.search,
+            "selected_sort": self.sort,
+            "selected_status": self.status,
+            "per_page": self.per_page,
+            "start_date": self.start_date_filter,
+            "end_date": self.end_date_filter,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "allowed_sorts": self.allowed_sorts,
+        }
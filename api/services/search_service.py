@@ -0,0 +1,97 @@
+import re
+from sqlalchemy import func, literal, or_, select, union_all
+from sqlalchemy.dialects.mysql import match
+from config import Config
+from db import db
+from models.product_model import Product
+from models.raffle_model import Raffle
+
+# InnoDB ignores shorter words in FULLTEXT indexes (innodb_ft_min_token_size)
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+
+def search_raffle_ids(search: str, scope=None, limit: int = None) -> list[int]:
+    """Ids of the raffles matching search in their title, description or products'
+    names and descriptions, most relevant first.
+
+    scope is an optional SELECT of raffle ids the results are restricted to (e.g. the
+    user's raffles). Backed by the FULLTEXT indexes on raffles and products; a search
+    made only of words too short for the index falls back to a LIKE scan.
+    """
+    limit = limit or Config.SEARCH_MAX_RESULTS
+    boolean_query = build_boolean_query(search)
+    if boolean_query is None:
+        return search_raffle_ids_by_pattern(search, scope, limit)
+
+    raffle_score = match(
+        Raffle.title, Raffle.description, against=boolean_query
+    ).in_boolean_mode()
+    product_score = match(
+        Product.name, Product.description, against=boolean_query
+    ).in_boolean_mode()
+
+    scores = union_all(
+        select(Raffle.id.label("raffle_id"), raffle_score.label("score")).where(
+            raffle_score
+        ),
+        select(
+            Product.raffle_id.label("raffle_id"), product_score.label("score")
+        ).where(product_score),
+    ).subquery()
+
+    relevance = func.sum(scores.c.score)
+    statement = select(scores.c.raffle_id)
+    if scope is not None:
+        statement = statement.where(scores.c.raffle_id.in_(scope))
+
+    return db.session.scalars(
+        statement.group_by(scores.c.raffle_id)
+        .order_by(relevance.desc(), scores.c.raffle_id.desc())
+        .limit(limit)
+    ).all()
+
+
+# Every word is required and matched as a prefix ("+lego* +star*"). Returns None when
+# no word is long enough for the index.
+def build_boolean_query(search: str) -> str | None:
+    words = [
+        word
+        for word in re.findall(r"\w+", search.lower())
+        if len(word) >= FULLTEXT_MIN_WORD_LENGTH
+    ]
+    if not words:
+        return None
+
+    return " ".join(f"+{word}*" for word in words)
+
+
+def search_raffle_ids_by_pattern(search: str, scope, limit: int) -> list[int]:
+    search_escaped = (
+        search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    search_pattern = f"%{search_escaped}%"
+
+    product_matches = (
+        select(literal(1))
+        .where(
+            Product.raffle_id == Raffle.id,
+            or_(
+                Product.name.ilike(search_pattern, escape="\\"),
+                Product.description.ilike(search_pattern, escape="\\"),
+            ),
+        )
+        .exists()
+    )
+
+    statement = select(Raffle.id).where(
+        or_(
+            Raffle.title.ilike(search_pattern, escape="\\"),
+            Raffle.description.ilike(search_pattern, escape="\\"),
+            product_matches,
+        )
+    )
+    if scope is not None:
+        statement = statement.where(Raffle.id.in_(scope))
+
+    return db.session.scalars(statement.order_by(Raffle.id.desc()).limit(limit)).all()
+
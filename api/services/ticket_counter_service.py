@@ -0,0 +1,149 @@
+import random
+from datetime import datetime, timezone
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from constants.raffle_status import RaffleStatus
+from db import db
+from models.raffle_model import Raffle
+from models.raffle_ticket_counter_shard_model import RaffleTicketCounterShard
+from models.raffle_user_ticket_count_model import RaffleUserTicketCount
+from models.ticket_model import Ticket
+from services.raffle_card_service import (
+    increment_card_tickets_sold,
+    sync_card_tickets_sold,
+)
+
+
+def increment_tickets_sold(raffle_id: int, quantity: int) -> bool:
+    """Add quantity to the sold tickets of raffle_id and its card, in the current
+    transaction, if the raffle is still ACTIVE and not due.
+
+    One atomic UPDATE of raffles.tickets_sold, which locks the raffle row until the
+    caller commits. Returns False (nothing changed) when the raffle is no longer open.
+    """
+    incremented = db.session.execute(
+        update(Raffle)
+        .where(
+            Raffle.id == raffle_id,
+            Raffle.status == RaffleStatus.ACTIVE,
+            Raffle.due_date > datetime.now(timezone.utc),
+        )
+        .values(tickets_sold=Raffle.tickets_sold + quantity)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not incremented:
+        return False
+
+    increment_card_tickets_sold(raffle_id, quantity)
+    return True
+
+
+def increment_ticket_counter_shard(raffle_id: int, shards: int, quantity: int) -> None:
+    """Add quantity to a random one of the raffle's shards, in the current transaction.
+
+    For hot raffles (ticket_counter_shards > 0): never writes the raffle (or card) row,
+    tickets_sold catches up when the shards are folded.
+    """
+    statement = mysql_insert(RaffleTicketCounterShard).values(
+        raffle_id=raffle_id, shard=random.randrange(shards), count=quantity
+    )
+    db.session.execute(
+        statement.on_duplicate_key_update(
+            count=RaffleTicketCounterShard.count + quantity
+        )
+    )
+
+
+def fold_ticket_counter_shards() -> int:
+    """Move the shard totals into raffles.tickets_sold. Returns the raffles folded."""
+    raffle_ids = db.session.scalars(
+        select(RaffleTicketCounterShard.raffle_id)
+        .where(RaffleTicketCounterShard.count != 0)
+        .distinct()
+    ).all()
+
+    for raffle_id in raffle_ids:
+        # Lock the raffle, then its shards so no increment lands between the read and
+        # the reset. Purchases take the same locks in the same order (a shared lock on
+        # the raffle, then a shard), so a fold never deadlocks with a purchase.
+        db.session.execute(
+            select(Raffle.id).where(Raffle.id == raffle_id).with_for_update()
+        )
+        shards = (
+            RaffleTicketCounterShard.query.filter_by(raffle_id=raffle_id)
+            .with_for_update()
+            .all()
+        )
+        total = sum(shard.count for shard in shards)
+        db.session.execute(
+            update(Raffle)
+            .where(Raffle.id == raffle_id)
+            .values(tickets_sold=Raffle.tickets_sold + total)
+        )
+        for shard in shards:
+            shard.count = 0
+        sync_card_tickets_sold([raffle_id])
+        db.session.commit()
+
+    return len(raffle_ids)
+
+
+def reconcile_tickets_sold(batch_size: int = 1000) -> int:
+    """Repair tickets_sold drift (e.g. tickets removed with a deleted user) from the
+    tickets table, in raffle id batches. Returns the number of raffles corrected.
+    """
+    tickets_count = (
+        select(func.count(Ticket.id))
+        .where(Ticket.raffle_id == Raffle.id)
+        .correlate(Raffle)
+        .scalar_subquery()
+    )
+    # Increments still sitting in shards are not part of tickets_sold yet
+    pending_in_shards = (
+        select(func.coalesce(func.sum(RaffleTicketCounterShard.count), 0))
+        .where(RaffleTicketCounterShard.raffle_id == Raffle.id)
+        .correlate(Raffle)
+        .scalar_subquery()
+    )
+    expected = tickets_count - pending_in_shards
+
+    corrected = 0
+    last_id = 0
+    while True:
+        batch_ids = db.session.scalars(
+            select(Raffle.id)
+            .where(Raffle.id > last_id)
+            .order_by(Raffle.id)
+            .limit(batch_size)
+        ).all()
+        if not batch_ids:
+            break
+
+        result = db.session.execute(
+            update(Raffle)
+            .where(Raffle.id.in_(batch_ids), Raffle.tickets_sold != expected)
+            .values(tickets_sold=expected)
+            .execution_options(synchronize_session=False)
+        )
+        sync_card_tickets_sold(batch_ids)
+        db.session.commit()
+        corrected += result.rowcount
+        last_id = batch_ids[-1]
+
+    return corrected
+
+
+def reconcile_user_ticket_counts() -> None:
+    """Rebuild the per-user purchase counters (RaffleUserTicketCount) from the tickets
+    table, e.g. after tickets were inserted outside the purchase engine.
+    """
+    counts = select(Ticket.raffle_id, Ticket.user_id, func.count(Ticket.id)).group_by(
+        Ticket.raffle_id, Ticket.user_id
+    )
+    statement = mysql_insert(RaffleUserTicketCount).from_select(
+        ["raffle_id", "user_id", "count"], counts
+    )
+    db.session.execute(
+        statement.on_duplicate_key_update(count=statement.inserted.count)
+    )
+    db.session.commit()
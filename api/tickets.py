@@ -1,11 +1,14 @@
 from flask import Blueprint, render_template, request, session
-from sqlalchemy import func, or_
-from constants.raffle_status import RaffleStatus
-from models.product_model import Product
+from sqlalchemy import case, func, select
 from models.raffle_model import Raffle
 from constants.ticket_status import TicketStatus
 from models.ticket_model import Ticket
+from services.raffle_query import RaffleQuery
+from services.raffle_listing_service import buyer_tag, count_listing
 from utils.helpers import login_required
+from utils.pagination import paginate_keyset
+from utils.loader_profiles import loader_profile
+from db import db
 
 tickets_bp = Blueprint("tickets_bp", __name__, url_prefix="/tickets")
 
@@ -18,17 +21,13 @@ tickets_bp = Blueprint("tickets_bp", __name__, url_prefix="/tickets")
 def my_tickets():
     current_user_id = session.get("user_id")
 
-    # Per page args
-    # Grab request args
-    page = request.args.get("page", 1, type=int)
-    page = max(page, 1)
-    per_page = request.args.get("per_page", 9, type=int)
-    per_page = min(max(per_page, 1), 9)
-
-    ## Search - Filters - Sort
-    search = request.args.get("search", "").strip()
-    selected_status = request.args.get("status_filter", "all")
-    category_filter = request.args.get("category")
+    # Grab request args - search, status and page (see services/raffle_query.py)
+    raffle_query = RaffleQuery(
+        request.args,
+        default_sort="due_soon",
+        max_per_page=9,
+        allowed_sorts=["due_soon"],
+    )
 
     # Global metadata — computed before filters are applied
     user_tickets = Ticket.query.filter(Ticket.user_id == current_user_id)
@@ -45,55 +44,61 @@ def my_tickets():
         "won_tickets": won_tickets,
     }
 
-    query = (
-        Raffle.query.join(Ticket).filter(Ticket.user_id == current_user_id).distinct()
+    # Raffles the user has tickets in - a semi-join, so no DISTINCT over the tickets
+    query = Raffle.query.options(*loader_profile("card")).filter(
+        Raffle.id.in_(
+            select(Ticket.raffle_id).where(Ticket.user_id == current_user_id)
+        )
     )
 
-    # Filters
-    ## Status filter
-    allowed_statuses = ["all"] + [s.value for s in RaffleStatus]
-
-    if selected_status not in allowed_statuses:
-        selected_status = "all"
+    query, _ = raffle_query.compile(query, Raffle, Raffle.id)
 
-    if selected_status != "all":
-        query = query.filter(Raffle.status == selected_status)
-
-    ## Category filter
-    # TODO: implement this once categories are added to the raffle products
-    if category_filter:
-        pass
-
-    if search:
-        search_escaped = (
-            search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-        )
-        search_pattern = f"%{search_escaped}%"
+    # Cursor pagination on (due_date, id) - see utils/pagination.py; the total is cached
+    columns, descending = raffle_query.sort_key(Raffle, Raffle.id)
+    total = count_listing(
+        raffle_query,
+        ("my_tickets", current_user_id),
+        query,
+        tags=(buyer_tag(current_user_id),),
+    )
+    pagination = paginate_keyset(
+        query,
+        columns,
+        descending,
+        raffle_query.cursor,
+        raffle_query.per_page,
+        total=total,
+    )
+    raffles: list[Raffle] = pagination.items
 
-        query = (
-            query.join(Product, Product.raffle_id == Raffle.id)
-            .filter(
-                or_(
-                    Raffle.title.ilike(search_pattern, escape="\\"),
-                    Raffle.description.ilike(search_pattern, escape="\\"),
-                    Product.name.ilike(search_pattern, escape="\\"),
-                    Product.description.ilike(search_pattern, escape="\\"),
-                )
-            )
-            .distinct()
+    # The user's own tickets in each raffle of the page, in one grouped query
+    raffle_ids = [raffle.id for raffle in raffles]
+    ticket_stats = db.session.execute(
+        select(
+            Ticket.raffle_id,
+            func.count(Ticket.id),
+            func.sum(Ticket.price),
+            func.sum(case((Ticket.status == TicketStatus.WINNER, 1), else_=0)),
+            func.sum(case((Ticket.status == TicketStatus.PENDING, 1), else_=0)),
         )
-
-    query = query.order_by(Raffle.due_date.asc())
-
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    raffles: list[Raffle] = pagination.items
+        .where(Ticket.user_id == current_user_id, Ticket.raffle_id.in_(raffle_ids))
+        .group_by(Ticket.raffle_id)
+    ).all()
+    user_ticket_stats = {
+        raffle_id: {
+            "count": count,
+            "spent": spent or 0,
+            "won": bool(won),
+            "pending": bool(pending),
+        }
+        for raffle_id, count, spent, won, pending in ticket_stats
+    }
 
     return render_template(
         "/tickets/my_tickets.html",
         metadata=metadata,
         raffles=raffles,
         pagination=pagination,
-        search=search,
-        per_page=per_page,
-        selected_status=selected_status,
+        user_ticket_stats=user_ticket_stats,
+        **raffle_query.template_context(),
     )
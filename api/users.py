@@ -12,6 +12,7 @@ from flask import (
     url_for,
 )
 
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timezone
@@ -21,16 +22,23 @@ from forms.user_form import DeleteSelfAccountForm, UserForm, UserSelfUpdateForm
 from db import db
 from models.user_model import User
 from models.message_model import Message
+from models.archived_message_model import ArchivedMessage
+from services.message_archive_service import has_archived_messages
+from services.notifications_service import mark_messages_read
+from services.raffle_card_service import rename_creator_on_cards
 from utils.helpers import (
     is_safe_url,
     login_required,
 )
 from utils.file_helpers import delete_profile_picture
+from utils.identity import get_current_user
+from utils.pagination import paginate_keyset
 from werkzeug.security import check_password_hash
 from werkzeug.exceptions import Forbidden
 
 USER_ROLE = "user"
 ADMIN_ROLE = "admin"
+MESSAGES_PER_PAGE = 20
 
 users_bp = Blueprint("users_bp", __name__)
 
@@ -97,9 +105,8 @@ def register():
         # ----------------------------
         # Log user in
         # ----------------------------
+        session.clear()
         session["user_id"] = user.id
-        session["username"] = user.username
-        session["first_name"] = user.first_name
 
         flash("Registration successful! You are now logged in.", "success")
         return redirect("/")
@@ -113,24 +120,54 @@ def register():
 @users_bp.route("/profile/messages", methods=["GET"])
 @login_required
 def get_messages():
-    messages = (
-        Message.query.filter_by(user_id=session["user_id"])
-        .order_by(Message.created_at.desc())
-        .all()
+    user: User = get_current_user()
+    cursor = request.args.get("cursor") or None
+
+    # Messages above this id are new. It is the watermark as it was when the inbox was
+    # opened, carried along the page links so older pages keep their highlighting.
+    since = request.args.get("since", type=int)
+    if since is None:
+        since = user.last_read_message_id or 0
+
+    # Live messages first, then the archived ones (archive-messages) - the archive is
+    # only read once the user pages past the last live message
+    is_archive = request.args.get("source") == "archive"
+    model = ArchivedMessage if is_archive else Message
+
+    # Newest first, cursor-paginated on the id (utils/pagination.py)
+    query = model.query.filter_by(user_id=user.id).options(joinedload(model.broadcast))
+    pagination = paginate_keyset(query, [model.id], True, cursor, MESSAGES_PER_PAGE)
+    messages: list[Message] = pagination.items
+
+    has_archive = False
+    if not is_archive and not pagination.has_next:
+        has_archive = has_archived_messages(user.id)
+        if has_archive and not messages:
+            return redirect(url_for("users_bp.get_messages", source="archive"))
+
+    # Everything up to the newest message on the page is read now - one UPDATE, and
+    # none at all once the inbox has been seen (archived messages are all read)
+    newest_id = max((message.id for message in messages), default=0)
+    has_unseen = (
+        not is_archive
+        and messages
+        and (newest_id > (user.last_read_message_id or 0) or user.unread_count > 0)
     )
-
-    unread = []
-    for message in messages:
-        if not message.is_read:
-            unread.append(message)
-
-    if unread:
-        for message in unread:
-            message.is_new = True
-            message.is_read = True
+    if has_unseen:
+        mark_messages_read(user.id, newest_id)
+
+    # Rendered before the commit, which would expire the page's rows one by one
+    page = render_template(
+        "messages/my_messages.html",
+        messages=messages,
+        pagination=pagination,
+        since=since,
+        is_archive=is_archive,
+        has_archive=has_archive,
+    )
+    if has_unseen:
         db.session.commit()
-
-    return render_template("messages/my_messages.html", messages=messages)
+    return page
 
 
 # ----------------------------
@@ -139,7 +176,7 @@ def get_messages():
 @users_bp.route("/users", methods=["GET"])
 @login_required
 def get_users():
-    user = db.session.get(User, session["user_id"])
+    user = get_current_user()
     if not user.is_admin:
         abort(403)
 
@@ -186,9 +223,7 @@ def get_users():
 @users_bp.route("/update/<int:id>", methods=["GET", "POST"])
 @login_required
 def update(id):
-    current_user_id = session.get("user_id")
-
-    actor: User = User.query.get_or_404(current_user_id)
+    actor: User = get_current_user()
     target_user: User = User.query.get_or_404(id)
 
     is_self = actor.id == target_user.id
@@ -230,6 +265,10 @@ def update(id):
         # ----------------------------
         # Update basic fields
         # ----------------------------
+        name_changed = (target_user.first_name, target_user.last_name) != (
+            form.first_name.data,
+            form.last_name.data,
+        )
         target_user.first_name = form.first_name.data
         target_user.last_name = form.last_name.data
         target_user.username = form.username.data
@@ -277,6 +316,8 @@ def update(id):
             target_user.profile_picture = None
 
         try:
+            if name_changed:
+                rename_creator_on_cards(target_user)
             db.session.commit()
             flash("User updated successfully", "success")
             # ✅ THIS is the important redirect
@@ -301,8 +342,7 @@ def update(id):
 @users_bp.route("/users/delete/<int:id>", methods=["POST"])
 @login_required
 def delete(id):
-    current_user_id = session.get("user_id")
-    actor: User = User.query.get_or_404(current_user_id)
+    actor: User = get_current_user()
     if not actor.is_admin:
         abort(403)
 
@@ -340,7 +380,7 @@ def delete_account():
                 flash(error, "danger")
         return redirect(url_for("users_bp.update", id=current_user_id))
 
-    user_to_delete: User = User.query.get_or_404(current_user_id)
+    user_to_delete: User = get_current_user()
     picture_to_delete = user_to_delete.profile_picture
 
     if not check_password_hash(user_to_delete.password, form.password.data):
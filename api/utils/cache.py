@@ -0,0 +1,91 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Small thread-safe in-process cache whose entries expire after ttl seconds.
+
+    Entries can carry tags (e.g. "creator:42") so every entry derived from some data
+    can be dropped at once with invalidate_tags when that data changes. With max_size,
+    the oldest entries are evicted once the cache holds more than that. Expired entries
+    are dropped when read, and from the oldest end whenever an entry is stored.
+    """
+
+    def __init__(self, ttl: float, max_size: int = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        # key -> (expires_at, value), oldest first (every ttl is the same)
+        self._entries = {}
+        self._keys_by_tag = {}
+        self._tags_by_key = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return default
+
+            return value
+
+    def set(self, key, value, tags=()) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._drop(key)
+            self._entries[key] = (now + self.ttl, value)
+            if tags:
+                self._tags_by_key[key] = set(tags)
+                for tag in tags:
+                    self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            # Evict the expired entries, then the oldest ones beyond max_size
+            while self._entries:
+                oldest_key = next(iter(self._entries))
+                expires_at, _ = self._entries[oldest_key]
+                if expires_at > now and not self._is_over_size():
+                    break
+                self._drop(oldest_key)
+
+    def get_or_set(self, key, compute, tags=()):
+        """Cached value of key, computing and storing it with compute() on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value, tags)
+        return value
+
+    def invalidate(self, key=None) -> None:
+        """Drop key, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._keys_by_tag.clear()
+                self._tags_by_key.clear()
+            else:
+                self._drop(key)
+
+    def invalidate_tags(self, *tags) -> None:
+        """Drop every entry stored with any of tags."""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def _is_over_size(self) -> bool:
+        return self.max_size is not None and len(self._entries) > self.max_size
+
+    def _drop(self, key) -> None:
+        # Lock held: remove the entry and every tag reference to it
+        self._entries.pop(key, None)
+        for tag in self._tags_by_key.pop(key, ()):
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
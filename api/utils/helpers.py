@@ -11,6 +11,7 @@ from phonenumbers.phonenumberutil import (
     PhoneNumberType,
 )
 from requests.compat import urljoin, urlparse
+from utils.identity import get_current_user
 
 
 def is_valid_phone_number(phone: str, country_code: str = "RO") -> tuple[bool, str]:
@@ -94,6 +95,11 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if session.get("user_id") is None:
             return redirect("/login")
+
+        # The account may have been deleted since the user logged in
+        if get_current_user() is None:
+            session.clear()
+            return redirect("/login")
         return f(*args, **kwargs)
 
     return decorated_function
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from config import Config
+from db import db
+from models.user_model import User
+
+# Request-scoped current user. The logged in user is loaded once per request into
+# g.current_user (login_required, the routes and the templates all read it from there),
+# from a small per-process LRU of user rows so most requests need no users query.
+#
+# Every user has a version that is bumped whenever an update or delete of the row
+# commits in this process; a cached row is only used while its version is current, and
+# a load that races with an update is not stored. Other processes see the change within
+# IDENTITY_CACHE_TTL_SECONDS at the latest.
+
+_NOT_LOADED = object()
+# Session.info key of the user ids to invalidate when the session commits
+PENDING_INVALIDATIONS = "identity_invalidations"
+
+
+class _IdentityCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def get(self, user_id: int):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+
+            version, expires_at, values = entry
+            is_stale = version != self._versions.get(user_id, 0)
+            if is_stale or expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id: int, version: int, values: dict) -> None:
+        with self._lock:
+            # An update landed while the row was being loaded - keep it out
+            if version != self._versions.get(user_id, 0):
+                return
+
+            self._entries[user_id] = (version, time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def bump(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_identity_cache = _IdentityCache(
+    Config.IDENTITY_CACHE_SIZE, Config.IDENTITY_CACHE_TTL_SECONDS
+)
+
+
+def get_current_user() -> User | None:
+    """The logged in user, loaded at most once per request (None when logged out)."""
+    user = g.get("current_user", _NOT_LOADED)
+    if user is _NOT_LOADED:
+        user = load_user(session.get("user_id"))
+        g.current_user = user
+    return user
+
+
+def load_user(user_id: int | None) -> User | None:
+    """User user_id attached to the request's session, from the cache when current."""
+    if user_id is None:
+        return None
+
+    values = _identity_cache.get(user_id)
+    if values is not None:
+        # Rebuild the row as a detached instance and attach it without a query
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    version = _identity_cache.version(user_id)
+    user = db.session.get(User, user_id)
+    if user is not None:
+        _identity_cache.set(user_id, version, user_column_values(user))
+    return user
+
+
+def clear_cached_users() -> None:
+    """Empty this process's cache of user rows (versions are kept)."""
+    _identity_cache.clear()
+
+
+def user_column_values(user: User) -> dict:
+    return {
+        column.key: getattr(user, column.key)
+        for column in inspect(User).column_attrs
+    }
+
+
+def invalidate_user(user_id: int, session: Session = None) -> None:
+    """Drop the cached row of user_id once session (db.session by default) commits.
+
+    Bumping before the commit would let a concurrent request cache the old row under
+    the new version. Called automatically on ORM updates/deletes of users.
+    """
+    session = session or db.session()
+    session.info.setdefault(PENDING_INVALIDATIONS, set()).add(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_updated_user(mapper, connection, user):
+    invalidate_user(user.id, object_session(user))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop(PENDING_INVALIDATIONS, ()):
+        _identity_cache.bump(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_invalidations(session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
@@ -0,0 +1,28 @@
+from sqlalchemy.orm import joinedload, selectinload
+from models.raffle_model import Raffle
+from models.product_model import Product
+
+# Named eager-loading profiles: which relationships a page renders, loaded up front with
+# a fixed number of queries instead of one lazy load per row. Apply with
+# query.options(*loader_profile("card")).
+#
+# - card: raffle rows of the my raffles / my tickets listings (products and their
+#   images, one selectin query each for the whole page)
+# - detail: the raffle details page (creator, prize delivery, products and images)
+# - settlement: raffles settled by the job (creator, messaged on every outcome; selectin
+#   so the job's grouped COUNT query stays free of joins)
+#
+# The dashboard renders RaffleCard rows (models/raffle_card_model.py), which need none.
+LOADER_PROFILES = {
+    "card": (selectinload(Raffle.products).selectinload(Product.images),),
+    "detail": (
+        joinedload(Raffle.creator),
+        joinedload(Raffle.prize_delivery),
+        selectinload(Raffle.products).selectinload(Product.images),
+    ),
+    "settlement": (selectinload(Raffle.creator),),
+}
+
+
+def loader_profile(name: str) -> tuple:
+    return LOADER_PROFILES[name]
@@ -0,0 +1,230 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# Cursor of the last page - walks the sort backwards from the end
+LAST_PAGE_CURSOR = "last"
+
+
+class KeysetPage:
+    """A page of a cursor-paginated listing, with the cursors of its neighbours.
+
+    total is only known when the listing provides it (e.g. a cached count).
+    """
+
+    def __init__(
+        self, items, per_page, next_cursor=None, prev_cursor=None, total=None
+    ):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def paginate_keyset(
+    query, columns, descending, cursor, per_page, total=None
+) -> KeysetPage:
+    """Page query by its sort key instead of OFFSET, so every page costs the same.
+
+    columns is the sort key - the last one must be unique (the primary key) - and all
+    of them are sorted in the same direction. cursor is the opaque next/prev cursor of
+    the page the user comes from (None for the first page, LAST_PAGE_CURSOR for the
+    last one). total is passed through to the page.
+    """
+    direction, values = decode_cursor(cursor)
+    backwards = direction in ("prev", LAST_PAGE_CURSOR)
+
+    page_query = query
+    if values is not None:
+        # Rows after the cursor in the walk direction
+        page_query = page_query.filter(
+            keyset_condition(columns, values, after=descending == backwards)
+        )
+
+    walk_descending = descending != backwards
+    page_query = page_query.order_by(
+        *(column.desc() if walk_descending else column.asc() for column in columns)
+    )
+
+    rows = page_query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if backwards:
+        has_next = direction == "prev"
+        has_prev = has_more
+    else:
+        has_next = has_more
+        has_prev = values is not None
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor("next", rows[-1], columns)
+    if rows and has_prev:
+        prev_cursor = encode_cursor("prev", rows[0], columns)
+
+    return KeysetPage(
+        rows,
+        per_page,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total=total,
+    )
+
+
+def paginate_ranked_ids(query, id_column, ranked_ids, cursor, per_page) -> KeysetPage:
+    """Page query in the order of ranked_ids (e.g. search relevance).
+
+    ranked_ids is a bounded list (see SEARCH_MAX_RESULTS), so the cursor is a position
+    in it: one ids-only query keeps the ids that pass the query's filters, then one
+    query loads the page.
+    """
+    id_rows = query.with_entities(id_column).filter(id_column.in_(ranked_ids)).all()
+    matching_ids = {row_id for (row_id,) in id_rows}
+    ordered_ids = [row_id for row_id in ranked_ids if row_id in matching_ids]
+
+    direction, values = decode_cursor(cursor)
+    if direction == LAST_PAGE_CURSOR:
+        start = max(len(ordered_ids) - 1, 0) // per_page * per_page
+    elif values and isinstance(values[0], int):
+        start = values[0] if direction == "next" else values[0] - per_page
+    else:
+        start = 0
+    start = min(max(start, 0), len(ordered_ids))
+
+    page_ids = ordered_ids[start : start + per_page]
+    rows_by_id = {
+        getattr(row, id_column.key): row
+        for row in query.filter(id_column.in_(page_ids))
+    }
+    end = start + len(page_ids)
+
+    return KeysetPage(
+        [rows_by_id[row_id] for row_id in page_ids if row_id in rows_by_id],
+        per_page,
+        next_cursor=build_cursor("next", [end]) if end < len(ordered_ids) else None,
+        prev_cursor=build_cursor("prev", [start]) if start > 0 else None,
+        total=len(ordered_ids),
+    )
+
+
+def paginate_sorted_entries(entries, descending, cursor, per_page) -> KeysetPage:
+    """Page an in-memory listing with the same cursors as paginate_keyset.
+
+    entries are tuples sorted ascending whose first two items are the sort key
+    (sort value, id) - e.g. a cached listing (see services/raffle_listing_service.py).
+    The cursor is a key, not a position, so it stays valid when the list is refreshed.
+    """
+    keys = [entry[:2] for entry in entries]
+    walk = entries[::-1] if descending else entries
+    total = len(entries)
+
+    direction, values = decode_cursor(cursor)
+    cursor_key = tuple(values) if values is not None and len(values) == 2 else None
+
+    if direction == LAST_PAGE_CURSOR:
+        end = total
+        start = max(end - per_page, 0)
+    elif cursor_key is None:
+        start = 0
+        end = min(per_page, total)
+    else:
+        try:
+            if direction == "next":
+                # First entry after the cursor in walk order
+                if descending:
+                    start = total - bisect_left(keys, cursor_key)
+                else:
+                    start = bisect_right(keys, cursor_key)
+                end = min(start + per_page, total)
+            else:
+                # Entries before the cursor in walk order
+                if descending:
+                    end = total - bisect_right(keys, cursor_key)
+                else:
+                    end = bisect_left(keys, cursor_key)
+                start = max(end - per_page, 0)
+        except TypeError:
+            # A cursor from another sort (values of another type)
+            start = 0
+            end = min(per_page, total)
+
+    items = walk[start:end]
+    next_cursor = prev_cursor = None
+    if items and end < total:
+        next_cursor = build_cursor("next", items[-1][:2])
+    if items and start > 0:
+        prev_cursor = build_cursor("prev", items[0][:2])
+
+    return KeysetPage(
+        items, per_page, next_cursor=next_cursor, prev_cursor=prev_cursor, total=total
+    )
+
+
+# (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which MySQL turns into
+# index range scans
+def keyset_condition(columns, values, after):
+    clauses = []
+    for position, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [
+            prefix_column == prefix_value
+            for prefix_column, prefix_value in zip(
+                columns[:position], values[:position]
+            )
+        ]
+        bound = column > value if after else column < value
+        clauses.append(and_(*equal_prefix, bound))
+    return or_(*clauses)
+
+
+def encode_cursor(direction, row, columns) -> str:
+    return build_cursor(direction, [getattr(row, column.key) for column in columns])
+
+
+def build_cursor(direction, values) -> str:
+    payload = {
+        "d": direction,
+        "v": [
+            {"dt": value.isoformat()} if isinstance(value, datetime) else value
+            for value in values
+        ],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# Returns (direction, values); a missing or tampered cursor means the first page
+def decode_cursor(cursor):
+    if not cursor:
+        return "next", None
+    if cursor == LAST_PAGE_CURSOR:
+        return LAST_PAGE_CURSOR, None
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction = payload["d"]
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload["v"]
+        ]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return "next", None
+
+    if direction not in ("next", "prev"):
+        return "next", None
+    return direction, values
@@ -0,0 +1,182 @@
+import secrets
+from datetime import datetime, timezone
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from werkzeug.datastructures import CallbackDict
+from db import db
+from models.session_model import StoredSession
+from utils.cache import TTLCache
+
+# SQL-backed Flask sessions, shared by every app node (replaces Flask-Session's
+# filesystem store).
+#
+# The cookie holds "<session id>.<version>". Every write bumps the version and sends
+# the new cookie, so a node serves the session from its in-process cache only while
+# the cached version is not older than the cookie's - reads are a dict lookup, yet a
+# request never sees an older session than the one the previous request (on any
+# node) wrote. Rows are only written when the session changes, or to push the expiry
+# forward once half the lifetime has passed. Expired rows are removed by sweep-sessions.
+#
+# A deleted session (logout, deleted account) is dropped from the cache of the node
+# that deleted it only; the other nodes keep serving their cached copy until it
+# expires, so SESSION_CACHE_TTL_SECONDS bounds how long a revoked session lives on.
+
+serializer = TaggedJSONSerializer()
+
+
+class SqlSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, version=0, expires_at=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid or secrets.token_urlsafe(32)
+        self.version = version
+        self.expires_at = expires_at
+        self.modified = False
+        # Stored id this session replaces (see clear) - its row is deleted on save
+        self.replaced_sid = None
+
+    def clear(self):
+        # A cleared session (login, logout) never keeps its id: the next save writes a
+        # new one and deletes the old row, so an id handed out before login can't be
+        # fixated onto the logged in session
+        super().clear()
+        if self.version and self.replaced_sid is None:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.version = 0
+        self.expires_at = None
+
+
+class SqlSessionInterface(SessionInterface):
+    def __init__(self, cache_ttl: float, cache_size: int):
+        # session id -> (version, serialized data, expires_at)
+        self.cache = TTLCache(cache_ttl, max_size=cache_size)
+
+    def open_session(self, app, request):
+        sid, version = parse_cookie(request.cookies.get(self.get_cookie_name(app)))
+        if sid is None:
+            return SqlSession()
+
+        # A cached copy older than the cookie was replaced on another node
+        entry = self.cache.get(sid)
+        if entry is None or entry[0] < version:
+            entry = load_session_row(sid)
+            if entry is None:
+                return SqlSession()
+            self.cache.set(sid, entry)
+
+        stored_version, data, expires_at = entry
+        if expires_at <= datetime.now(timezone.utc):
+            return SqlSession()
+
+        return SqlSession(
+            serializer.loads(data),
+            sid=sid,
+            version=stored_version,
+            expires_at=expires_at,
+        )
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.replaced_sid is not None:
+            self.delete_stored_session(session.replaced_sid)
+
+        # Emptied (e.g. logout): drop the row and the cookie
+        if not session:
+            if session.modified:
+                if session.version:
+                    self.delete_stored_session(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = datetime.now(timezone.utc)
+        lifetime = app.permanent_session_lifetime
+        needs_refresh = (
+            session.expires_at is None or session.expires_at - now < lifetime / 2
+        )
+        if not session.modified and not needs_refresh:
+            return
+
+        version = session.version + 1
+        expires_at = now + lifetime
+        data = serializer.dumps(dict(session))
+        statement = mysql_insert(StoredSession).values(
+            id=session.sid,
+            user_id=session.get("user_id"),
+            data=data,
+            version=version,
+            expires_at=expires_at,
+        )
+        with db.engine.begin() as connection:
+            connection.execute(
+                statement.on_duplicate_key_update(
+                    user_id=statement.inserted.user_id,
+                    data=statement.inserted.data,
+                    version=statement.inserted.version,
+                    expires_at=statement.inserted.expires_at,
+                )
+            )
+        self.cache.set(session.sid, (version, data, expires_at))
+
+        response.set_cookie(
+            name,
+            f"{session.sid}.{version}",
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def delete_stored_session(self, sid: str) -> None:
+        with db.engine.begin() as connection:
+            connection.execute(delete(StoredSession).where(StoredSession.id == sid))
+        self.cache.invalidate(sid)
+
+
+def parse_cookie(value: str | None) -> tuple[str | None, int | None]:
+    """(session id, version) from the cookie, (None, None) when absent or malformed."""
+    if not value:
+        return None, None
+
+    sid, _, version = value.rpartition(".")
+    if not sid or not version.isdigit():
+        return None, None
+    return sid, int(version)
+
+
+def load_session_row(sid: str):
+    """(version, serialized data, expires_at) of the stored session, None if missing."""
+    with db.engine.connect() as connection:
+        row = connection.execute(
+            select(
+                StoredSession.version, StoredSession.data, StoredSession.expires_at
+            ).where(StoredSession.id == sid)
+        ).first()
+    if row is None:
+        return None
+
+    version, data, expires_at = row
+    # MySQL DATETIME columns come back naive - they are stored in UTC
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return version, data, expires_at
+
+
+def delete_expired_sessions(chunk_size: int) -> int:
+    """Delete up to chunk_size expired sessions. Returns the number deleted."""
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            delete(StoredSession)
+            .where(StoredSession.expires_at < datetime.now(timezone.utc))
+            .with_dialect_options(mysql_limit=chunk_size)
+        )
+    return result.rowcount
@@ -0,0 +1,275 @@
+"""Benchmark the settlement job (process_raffles) against synthetic raffles at scale.
+
+Seeds a configurable number of users, due ACTIVE raffles and tickets per raffle into the
+local database, then times process_raffles end to end in a fresh process (so seeding
+doesn't count towards its memory) and reports wall time, SQL statement count and peak
+RSS. Everything it creates is marked (users "bench_*", raffles "BENCH -*") and removed
+at the start of the next run, or with --cleanup.
+
+Run from the repo root against a local database only:
+    python scripts/benchmark_settlement.py --users 50000 --raffles 10000 --tickets-per-raffle 500
+    python scripts/benchmark_settlement.py --raffles 2000 --workers 4
+    python scripts/benchmark_settlement.py --cleanup
+
+With --workers > 1 only the statements of the settling (parent) process are counted -
+the workers' are not; the peak RSS is reported for that process and for the largest
+worker.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Make the app importable regardless of where the script is run from:
+# the app is rooted at api/, and app.py also imports the `api` package (repo root).
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, os.path.join(ROOT, "api")]
+
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import delete, event, insert, or_, select
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models.user_model import User
+from models.raffle_model import Raffle
+from models.product_model import Product
+from models.ticket_model import Ticket
+from models.message_model import Message
+from models.broadcast_message_model import BroadcastMessage
+from models.notification_outbox_model import NotificationOutbox
+from models.prize_delivery_model import PrizeDelivery
+from models.prize_delivery_log_model import PrizeDeliveryLog
+from models.settlement_journal_model import SettlementJournalEntry
+from constants.raffle_status import RaffleStatus
+from constants.product_condition import ProductCondition
+from jobs.raffles_processor import process_raffles
+
+USERNAME_PREFIX = "bench_"
+MARKER_TITLE = "BENCH -"
+CHUNK_SIZE = 10_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--raffles", type=int, default=100)
+    parser.add_argument("--tickets-per-raffle", type=int, default=100)
+    parser.add_argument(
+        "--min-tickets",
+        type=int,
+        default=None,
+        help="minimum_required_tickets of the seeded raffles; defaults to half of "
+        "--tickets-per-raffle on every other raffle so both settlement paths run",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--cleanup", action="store_true", help="only remove previous benchmark data"
+    )
+    parser.add_argument(
+        "--settle-only",
+        action="store_true",
+        help="only run and measure the settlement of already seeded data (used "
+        "internally to measure it in a fresh process)",
+    )
+    return parser.parse_args()
+
+
+def insert_in_chunks(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start : start + CHUNK_SIZE])
+    db.session.commit()
+
+
+def cleanup():
+    bench_users = select(User.id).where(User.username.like(f"{USERNAME_PREFIX}%"))
+    bench_raffles = select(Raffle.id).where(Raffle.title.like(f"{MARKER_TITLE}%"))
+    bench_deliveries = select(PrizeDelivery.id).where(
+        PrizeDelivery.raffle_id.in_(bench_raffles)
+    )
+
+    # Core deletes, children first - the ORM cascades would load every row
+    for statement in (
+        delete(PrizeDeliveryLog).where(
+            PrizeDeliveryLog.prize_delivery_id.in_(bench_deliveries)
+        ),
+        delete(Message).where(
+            or_(Message.user_id.in_(bench_users), Message.raffle_id.in_(bench_raffles))
+        ),
+        delete(PrizeDelivery).where(PrizeDelivery.raffle_id.in_(bench_raffles)),
+        delete(BroadcastMessage).where(BroadcastMessage.raffle_id.in_(bench_raffles)),
+        delete(NotificationOutbox).where(NotificationOutbox.user_id.in_(bench_users)),
+        delete(SettlementJournalEntry).where(
+            SettlementJournalEntry.raffle_id.in_(bench_raffles)
+        ),
+        delete(Ticket).where(Ticket.raffle_id.in_(bench_raffles)),
+        delete(Product).where(Product.raffle_id.in_(bench_raffles)),
+        delete(Raffle).where(Raffle.title.like(f"{MARKER_TITLE}%")),
+        delete(User).where(User.username.like(f"{USERNAME_PREFIX}%")),
+    ):
+        db.session.execute(statement)
+    db.session.commit()
+
+
+def seed(users_count, raffles_count, tickets_per_raffle, min_tickets):
+    password = generate_password_hash("password123")
+    now = datetime.now(timezone.utc)
+
+    insert_in_chunks(
+        User,
+        [
+            {
+                "first_name": "Bench",
+                "last_name": f"User {i}",
+                "username": f"{USERNAME_PREFIX}{i}",
+                "email": f"{USERNAME_PREFIX}{i}@example.com",
+                "password": password,
+                "phone": "40712345678",
+                "country": "ro",
+                "address": "Str. Exemplu 1, Cluj",
+            }
+            for i in range(users_count)
+        ],
+    )
+    user_ids = db.session.scalars(
+        select(User.id)
+        .where(User.username.like(f"{USERNAME_PREFIX}%"))
+        .order_by(User.id)
+    ).all()
+
+    insert_in_chunks(
+        Raffle,
+        [
+            {
+                "creator_id": user_ids[i % len(user_ids)],
+                "title": f"{MARKER_TITLE} {i}",
+                "description": "Seeded by the settlement benchmark.",
+                "status": RaffleStatus.ACTIVE,
+                "ticket_price": 10,
+                "minimum_required_tickets": (
+                    min_tickets
+                    if min_tickets is not None
+                    else (tickets_per_raffle // 2 if i % 2 else tickets_per_raffle + 1)
+                ),
+                "maximum_tickets_per_user": tickets_per_raffle,
+                "tickets_sold": tickets_per_raffle,
+                "due_date": now - timedelta(hours=1),
+            }
+            for i in range(raffles_count)
+        ],
+    )
+    raffle_ids = db.session.scalars(
+        select(Raffle.id)
+        .where(Raffle.title.like(f"{MARKER_TITLE}%"))
+        .order_by(Raffle.id)
+    ).all()
+
+    insert_in_chunks(
+        Product,
+        [
+            {
+                "raffle_id": raffle_id,
+                "name": "Bench Prize",
+                "description": "A synthetic prize.",
+                "condition": ProductCondition.NEW,
+                "estimated_value": 100,
+                "quantity": 1,
+            }
+            for raffle_id in raffle_ids
+        ],
+    )
+
+    # Tickets are generated raffle by raffle so the full list never sits in memory
+    rows = []
+    buyer = 0
+    for raffle_id in raffle_ids:
+        for _ in range(tickets_per_raffle):
+            rows.append(
+                {
+                    "raffle_id": raffle_id,
+                    "user_id": user_ids[buyer % len(user_ids)],
+                    "price": 10,
+                }
+            )
+            buyer += 1
+        if len(rows) >= CHUNK_SIZE:
+            db.session.execute(insert(Ticket), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Ticket), rows)
+    db.session.commit()
+
+
+def peak_rss_mb(who):
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def benchmark(workers):
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(db.engine, "before_cursor_execute", count_statement)
+    started_at = time.perf_counter()
+    try:
+        process_raffles(workers=workers)
+    finally:
+        wall_time = time.perf_counter() - started_at
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+
+    print("\n================ BENCHMARK ================")
+    print(f"Workers            : {workers}")
+    print(f"Wall time          : {wall_time:.2f}s")
+    print(f"SQL statements     : {statements} (settling process)")
+    if workers > 1:
+        print("SQL statements     : not counted (workers)")
+    print(f"Peak RSS (process) : {peak_rss_mb(resource.RUSAGE_SELF):.1f} MB")
+    if workers > 1:
+        print(f"Peak RSS (workers) : {peak_rss_mb(resource.RUSAGE_CHILDREN):.1f} MB")
+    print("===========================================")
+
+
+# Settles in a new interpreter so its peak RSS only covers the settlement
+def run_benchmark_process(workers):
+    subprocess.run(
+        [sys.executable, __file__, "--settle-only", "--workers", str(workers)],
+        check=True,
+    )
+
+
+def main():
+    args = parse_args()
+
+    if args.settle_only:
+        with app.app_context():
+            benchmark(args.workers)
+        return
+
+    with app.app_context():
+        print("Removing previous benchmark data...")
+        cleanup()
+        if args.cleanup:
+            return
+
+        print(
+            f"Seeding {args.users} users, {args.raffles} raffles and "
+            f"{args.raffles * args.tickets_per_raffle} tickets..."
+        )
+        started_at = time.perf_counter()
+        seed(args.users, args.raffles, args.tickets_per_raffle, args.min_tickets)
+        print(f"Seeded in {time.perf_counter() - started_at:.1f}s")
+        # Release the seeding connections before the settling process starts
+        db.session.close()
+        db.engine.dispose()
+
+    run_benchmark_process(args.workers)
+
+
+if __name__ == "__main__":
+    main()
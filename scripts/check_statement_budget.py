@@ -0,0 +1,108 @@
+"""Check that the listing and detail pages run a fixed number of SQL statements.
+
+Requests each endpoint through the Flask test client as a logged-in user, once with
+one card per page and once with a full page, counts the SQL statements and fails
+when a page exceeds its budget or when the count grows with the number of cards
+(an N+1 slipped in - see utils/loader_profiles.py). Exits with status 1 on failure.
+
+Run from the repo root against a local database with some raffles and tickets:
+    python scripts/check_statement_budget.py --user-id 1 --raffle-id 1
+"""
+
+import argparse
+import os
+import sys
+
+# Make the app importable regardless of where the script is run from:
+# the app is rooted at api/, and app.py also imports the `api` package (repo root).
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, os.path.join(ROOT, "api")]
+
+from sqlalchemy import event
+
+from app import app, db
+from services.dashboard_stats_service import invalidate_dashboard_stats
+from services.raffle_listing_service import invalidate_raffle_listings
+from utils.identity import clear_cached_users
+
+# Statements per page, cold caches included (dashboard stats, listing totals)
+BUDGETS = {
+    "dashboard": 9,
+    "my raffles": 8,
+    "my tickets": 12,
+    "raffle details": 8,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--raffle-id", type=int, required=True)
+    return parser.parse_args()
+
+
+def endpoints(raffle_id):
+    # (name, url, page sizes to compare)
+    return [
+        ("dashboard", "/raffles/", (1, 6)),
+        ("my raffles", "/raffles/my-raffles", (1, 9)),
+        ("my tickets", "/tickets/", (1, 9)),
+        ("raffle details", f"/raffles/{raffle_id}", (None,)),
+    ]
+
+
+# Measure the worst case: no cached dashboard stats, listing totals or user rows
+def clear_caches():
+    invalidate_dashboard_stats()
+    invalidate_raffle_listings()
+    clear_cached_users()
+
+
+def count_statements(client, url):
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", count_statement)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_statement)
+
+    if response.status_code != 200:
+        raise SystemExit(f"GET {url} returned {response.status_code}")
+    return statements
+
+
+def main():
+    args = parse_args()
+    app.config["WTF_CSRF_ENABLED"] = False
+    failures = 0
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = args.user_id
+
+    for name, url, page_sizes in endpoints(args.raffle_id):
+        counts = []
+        for per_page in page_sizes:
+            clear_caches()
+            page_url = url if per_page is None else f"{url}?per_page={per_page}"
+            counts.append(count_statements(client, page_url))
+
+        budget = BUDGETS[name]
+        ok = max(counts) <= budget and len(set(counts)) == 1
+        failures += 0 if ok else 1
+        status = "OK" if ok else "FAIL"
+        print(f"[{status}] {name}: {counts} statements, budget {budget}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
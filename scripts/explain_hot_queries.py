@@ -0,0 +1,169 @@
+"""Check that MySQL uses the hot path indexes for the queries we run on every request.
+
+Runs EXPLAIN on the settlement, checkout, raffle details, my tickets and inbox queries
+and verifies that the expected index is picked for each one. Exits with status 1 when a
+query does not use its index. The unread badge reads User.unread_count, a primary key
+lookup, so it isn't listed.
+
+Run from the repo root against a database with representative data (on near-empty
+tables the optimizer may rightly prefer a full scan):
+    python scripts/explain_hot_queries.py
+    python scripts/explain_hot_queries.py --user-id 42 --raffle-id 7
+"""
+
+import argparse
+import os
+import sys
+
+# Make the app importable regardless of where the script is run from:
+# the app is rooted at api/, and app.py also imports the `api` package (repo root).
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, os.path.join(ROOT, "api")]
+
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app import app, db
+from models.raffle_model import Raffle
+from models.ticket_model import Ticket
+from models.message_model import Message
+from models.archived_message_model import ArchivedMessage
+from models.raffle_user_ticket_count_model import RaffleUserTicketCount
+from constants.raffle_status import RaffleStatus
+from constants.ticket_status import TicketStatus
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def visit_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--raffle-id", type=int, default=1)
+    parser.add_argument(
+        "--message-id",
+        type=int,
+        default=1_000_000,
+        help="inbox cursor / read watermark used in the message queries",
+    )
+    return parser.parse_args()
+
+
+# (label, statement, table, expected index)
+def hot_queries(user_id, raffle_id, message_id):
+    now = datetime.now(timezone.utc)
+
+    return [
+        (
+            "settlement: active raffles past due",
+            select(Raffle.id).where(
+                Raffle.status == RaffleStatus.ACTIVE, Raffle.due_date < now
+            ),
+            "raffles",
+            "ix_raffles_status_due_date",
+        ),
+        (
+            "watcher: due dates of active raffles",
+            select(Raffle.due_date)
+            .where(Raffle.status == RaffleStatus.ACTIVE)
+            .distinct(),
+            "raffles",
+            "ix_raffles_status_due_date",
+        ),
+        (
+            "settlement: tickets of a claimed raffle",
+            select(func.count(Ticket.id)).where(Ticket.raffle_id == raffle_id),
+            "tickets",
+            "ix_tickets_raffle_id_user_id",
+        ),
+        (
+            "checkout / raffle details: user's tickets in a raffle",
+            select(RaffleUserTicketCount.count).where(
+                RaffleUserTicketCount.raffle_id == raffle_id,
+                RaffleUserTicketCount.user_id == user_id,
+            ),
+            "raffle_user_ticket_counts",
+            "PRIMARY",
+        ),
+        (
+            "my tickets: totals",
+            select(func.count(Ticket.id), func.sum(Ticket.price)).where(
+                Ticket.user_id == user_id
+            ),
+            "tickets",
+            "ix_tickets_user_id_status",
+        ),
+        (
+            "my tickets: won tickets",
+            select(func.count(Ticket.id)).where(
+                Ticket.user_id == user_id, Ticket.status == TicketStatus.WINNER
+            ),
+            "tickets",
+            "ix_tickets_user_id_status",
+        ),
+        (
+            "inbox: next page of messages",
+            select(Message.id)
+            .where(Message.user_id == user_id, Message.id < message_id)
+            .order_by(Message.id.desc())
+            .limit(20),
+            "messages",
+            "ix_messages_user_id_id",
+        ),
+        (
+            "inbox: next page of archived messages",
+            select(ArchivedMessage.id)
+            .where(ArchivedMessage.user_id == user_id, ArchivedMessage.id < message_id)
+            .order_by(ArchivedMessage.id.desc())
+            .limit(20),
+            "message_archive",
+            "ix_message_archive_user_id_id",
+        ),
+        (
+            "inbox: mark messages read",
+            select(Message.id).where(
+                Message.user_id == user_id,
+                Message.is_read.is_(False),
+                Message.id <= message_id,
+            ),
+            "messages",
+            "ix_messages_user_id_is_read_created_at",
+        ),
+    ]
+
+
+def main():
+    args = parse_args()
+    failures = 0
+
+    with app.app_context():
+        for label, statement, table, expected_index in hot_queries(
+            args.user_id, args.raffle_id, args.message_id
+        ):
+            rows = db.session.execute(Explain(statement)).mappings().all()
+            used = [row["key"] for row in rows if row["table"] == table]
+            ok = expected_index in used
+            failures += 0 if ok else 1
+
+            print(f"[{'OK' if ok else 'FAIL'}] {label}")
+            print(f"       {table}: expected {expected_index}, used {used or None}")
+
+    if failures:
+        print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} not using its index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
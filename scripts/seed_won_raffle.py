@@ -81,6 +81,7 @@ def seed():
         ticket_price=10,
         minimum_required_tickets=1,
         maximum_tickets_per_user=5,
+        tickets_sold=1,
         due_date=datetime.now(timezone.utc) - timedelta(days=1),
     )
     db.session.add(raffle)